@@ -0,0 +1,33 @@
+"""create sentiment cache table
+
+Revision ID: 4e7a0c93d2b8
+Revises: 2f9d6b1c7e45
+Create Date: 2026-10-17 14:21:09.337415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '4e7a0c93d2b8'
+down_revision: Union[str, None] = '2f9d6b1c7e45'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sentiment_cache',
+    sa.Column('title_hash', sa.String(length=64), nullable=False),
+    sa.Column('sentiment_label', sa.String(), nullable=False),
+    sa.Column('sentiment_score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('title_hash')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sentiment_cache')
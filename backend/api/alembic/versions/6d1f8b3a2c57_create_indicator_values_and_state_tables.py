@@ -0,0 +1,55 @@
+"""create indicator values and state tables
+
+Revision ID: 6d1f8b3a2c57
+Revises: 9a3c5e1f7b20
+Create Date: 2026-10-17 16:40:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '6d1f8b3a2c57'
+down_revision: Union[str, None] = '9a3c5e1f7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('indicator_values',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('rsi', sa.Float(), nullable=True),
+    sa.Column('macd', sa.Float(), nullable=True),
+    sa.Column('macd_signal', sa.Float(), nullable=True),
+    sa.Column('macd_hist', sa.Float(), nullable=True),
+    sa.Column('stoch_slowk', sa.Float(), nullable=True),
+    sa.Column('stoch_slowd', sa.Float(), nullable=True),
+    sa.Column('sma', sa.Float(), nullable=True),
+    sa.Column('ema', sa.Float(), nullable=True),
+    sa.Column('adx', sa.Float(), nullable=True),
+    sa.Column('bbands_upper', sa.Float(), nullable=True),
+    sa.Column('bbands_middle', sa.Float(), nullable=True),
+    sa.Column('bbands_lower', sa.Float(), nullable=True),
+    sa.Column('atr', sa.Float(), nullable=True),
+    sa.Column('obv', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id', 'trade_date')
+    )
+    op.create_table('indicator_state',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('last_date', sa.Date(), nullable=False),
+    sa.Column('last_close', sa.Float(), nullable=False),
+    sa.Column('state', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('indicator_state')
+    op.drop_table('indicator_values')
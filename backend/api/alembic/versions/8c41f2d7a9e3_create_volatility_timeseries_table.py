@@ -0,0 +1,41 @@
+"""create volatility timeseries table
+
+Revision ID: 8c41f2d7a9e3
+Revises: 5b023e592e1d
+Create Date: 2026-10-17 10:12:44.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '8c41f2d7a9e3'
+down_revision: Union[str, None] = '5b023e592e1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('volatility_timeseries',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('window_days', sa.Integer(), nullable=False),
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('volatility', sa.Float(), nullable=True),
+    sa.Column('beta', sa.Float(), nullable=True),
+    sa.Column('n', sa.Integer(), nullable=True),
+    sa.Column('sum_x', sa.Float(), nullable=True),
+    sa.Column('sum_y', sa.Float(), nullable=True),
+    sa.Column('sum_xx', sa.Float(), nullable=True),
+    sa.Column('sum_yy', sa.Float(), nullable=True),
+    sa.Column('sum_xy', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id', 'window_days', 'trade_date')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('volatility_timeseries')
@@ -0,0 +1,36 @@
+"""add unique (stock_id, link) to news articles
+
+Revision ID: 9a3c5e1f7b20
+Revises: 4e7a0c93d2b8
+Create Date: 2026-10-17 15:02:44.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '9a3c5e1f7b20'
+down_revision: Union[str, None] = '4e7a0c93d2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep one row per (stock, link): stories double-inserted by concurrent
+    # requests, and older rows that stored the publisher URL as the link.
+    # news_articles is a one-day cache refilled on the next request.
+    op.execute(
+        "DELETE FROM news_articles WHERE id NOT IN ("
+        "SELECT MIN(id) FROM news_articles GROUP BY stock_id, link)"
+    )
+    op.create_unique_constraint(
+        'uq_news_articles_stock_id_link', 'news_articles', ['stock_id', 'link']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_news_articles_stock_id_link', 'news_articles', type_='unique')
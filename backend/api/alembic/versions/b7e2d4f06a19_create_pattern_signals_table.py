@@ -0,0 +1,36 @@
+"""create pattern signals table
+
+Revision ID: b7e2d4f06a19
+Revises: 6d1f8b3a2c57
+Create Date: 2026-10-17 17:25:31.660742
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b7e2d4f06a19'
+down_revision: Union[str, None] = '6d1f8b3a2c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pattern_signals',
+    sa.Column('stock_id', sa.Integer(), nullable=False),
+    sa.Column('trade_date', sa.Date(), nullable=False),
+    sa.Column('pattern', sa.String(), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['stock_id'], ['stocks.id'], ),
+    sa.PrimaryKeyConstraint('stock_id', 'trade_date', 'pattern')
+    )
+    op.create_index('ix_pattern_signals_pattern_trade_date', 'pattern_signals', ['pattern', 'trade_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pattern_signals_pattern_trade_date', table_name='pattern_signals')
+    op.drop_table('pattern_signals')
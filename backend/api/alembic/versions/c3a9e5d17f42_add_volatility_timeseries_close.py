@@ -0,0 +1,28 @@
+"""add close to volatility timeseries
+
+Revision ID: c3a9e5d17f42
+Revises: b7e2d4f06a19
+Create Date: 2026-10-18 10:05:27.914306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c3a9e5d17f42'
+down_revision: Union[str, None] = 'b7e2d4f06a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows keep NULL, so the next jobs/volatility.py run rebuilds them once
+    op.add_column('volatility_timeseries', sa.Column('close', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('volatility_timeseries', 'close')
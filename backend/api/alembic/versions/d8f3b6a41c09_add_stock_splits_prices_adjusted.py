@@ -0,0 +1,38 @@
+"""add prices_adjusted to stock splits
+
+Revision ID: d8f3b6a41c09
+Revises: c3a9e5d17f42
+Create Date: 2026-10-19 09:12:44.502318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd8f3b6a41c09'
+down_revision: Union[str, None] = 'c3a9e5d17f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'stock_splits',
+        sa.Column('prices_adjusted', sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+    # Splits dated before the last stored bar are taken as handled (the old
+    # date comparison gives nothing better to go on); the rest, including one
+    # dated on the last bar, get one full OHLC reload on the next ingest
+    op.execute(
+        "UPDATE stock_splits SET prices_adjusted = TRUE "
+        "WHERE split_date < (SELECT MAX(trade_date) FROM stock_ohlc "
+        "WHERE stock_ohlc.stock_id = stock_splits.stock_id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('stock_splits', 'prices_adjusted')
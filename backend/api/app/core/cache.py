@@ -0,0 +1,217 @@
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Any, Callable, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_obj_as
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+try:
+    from pydantic import TypeAdapter
+except ImportError:  # pydantic v1
+    TypeAdapter = None
+
+from .config import (
+    CACHE_MAX_ENTRIES,
+    CACHE_TTL_SECONDS,
+    DATA_VERSION_CHECK_SECONDS,
+    run_sync,
+)
+from ..models import DataVersion
+
+
+class CacheBackend:
+    """Interface for response cache stores; values are (etag, body) tuples."""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class LRUCache(CacheBackend):
+    """In-process LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_backend: CacheBackend = LRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+def get_cache_backend() -> CacheBackend:
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """Swap the response cache store, e.g. for one shared across workers."""
+    global _backend
+    _backend = backend
+
+
+_version_lock = threading.Lock()
+_version = {"value": None, "checked_at": 0.0}
+
+
+def get_data_version(db: Session) -> int:
+    """
+    Current data_version stamp, bumped by the ingest and volatility jobs.
+    Re-read from the database at most every DATA_VERSION_CHECK_SECONDS.
+    """
+    now = time.monotonic()
+    with _version_lock:
+        if _version["value"] is not None and now - _version["checked_at"] < DATA_VERSION_CHECK_SECONDS:
+            return _version["value"]
+    row = db.query(DataVersion.version).filter(DataVersion.id == 1).first()
+    value = row.version if row else 0
+    with _version_lock:
+        _version["value"] = value
+        _version["checked_at"] = now
+    return value
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_model):
+    return TypeAdapter(response_model)
+
+
+def _serialize(response_model, data):
+    """Validate ORM objects/rows/dicts into response_model, like FastAPI does."""
+    if TypeAdapter is None:
+        return parse_obj_as(response_model, data)
+    return _adapter(response_model).validate_python(data, from_attributes=True)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def _json_body(response_model, data) -> bytes:
+    content = jsonable_encoder(_serialize(response_model, data))
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+def _entry(body: bytes):
+    return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+
+def _entry_response(request: Request, entry, media_type: str) -> Response:
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+async def cached_response(
+    request: Request,
+    db,
+    key: Hashable,
+    load: Callable[[Session], Any],
+    encode: Callable[[Any], bytes],
+    media_type: str,
+) -> Response:
+    """
+    Serve `encode(load(session))` with `media_type`, from the cache when the
+    data version is unchanged. Responses carry a strong ETag and a matching
+    If-None-Match gets an empty 304.
+
+    The version check and, on a miss, `load` go through run_sync; `encode`
+    (validation, JSON or Arrow encoding) runs on the threadpool, so with
+    ASYNC_DB the event loop only does the database I/O. What `load` returns
+    must not need the session any more (no lazy loads).
+    """
+    backend = get_cache_backend()
+
+    def lookup(session):
+        cache_key = f"{get_data_version(session)}:{key!r}"
+        entry = backend.get(cache_key)
+        return cache_key, entry, load(session) if entry is None else None
+
+    cache_key, entry, data = await run_sync(db, lookup)
+    if entry is None:
+        entry = await run_in_threadpool(lambda: _entry(encode(data)))
+        backend.set(cache_key, entry)
+    return _entry_response(request, entry, media_type)
+
+
+def cached(response_model):
+    """
+    Route decorator: cache the handler's result per route and arguments,
+    invalidated when the data version changes. The handler must take `db`
+    (from Depends(get_session)); like db_route, it runs through run_sync and
+    always sees a regular Session. Serialization runs on the threadpool (see
+    cached_response).
+    Apply below @router.get so FastAPI sees the added `request` parameter.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        params = list(signature.parameters.values())
+        params.append(inspect.Parameter(
+            "_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request
+        ))
+
+        @wraps(func)
+        async def wrapper(*args, _cache_request: Request, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            arguments = {k: v for k, v in bound.arguments.items() if k != "db"}
+            key = (func.__name__,) + tuple(sorted(arguments.items()))
+            db = bound.arguments["db"]
+
+            def load(session):
+                bound.arguments["db"] = session
+                return func(*bound.args, **bound.kwargs)
+
+            return await cached_response(
+                _cache_request,
+                db,
+                key,
+                load,
+                lambda data: _json_body(response_model, data),
+                "application/json",
+            )
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,132 @@
+"""
+Content negotiation for chart data. Routes that can return NumPy columns
+(see crud.get_ohlc_arrays) serve, by the request's Accept header:
+
+    application/json                     the route's regular JSON body
+    application/x-columnar+json          {"column": [...], ...}, NaN as null
+    application/vnd.apache.arrow.stream  one Arrow IPC record batch
+
+pyarrow is optional and only imported when Arrow is actually served; without
+it Arrow is never negotiated (406 when nothing else is acceptable).
+"""
+import importlib.util
+import json
+from functools import lru_cache
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from fastapi import HTTPException, Request
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/x-columnar+json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# In server preference order: JSON stays the default for */* and no Accept
+MEDIA_TYPES = (JSON, COLUMNAR_JSON, ARROW_STREAM)
+
+# OpenAPI `responses` entry for negotiated routes
+COLUMNAR_RESPONSES = {200: {"content": {COLUMNAR_JSON: {}, ARROW_STREAM: {}}}}
+
+
+@lru_cache(maxsize=None)
+def arrow_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _accept_ranges(header: str):
+    ranges = []
+    for part in header.split(","):
+        media_range, *params = [p.strip() for p in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def _quality(offer: str, ranges) -> float:
+    """q of the most specific range matching `offer` (0 when none does)."""
+    type_wildcard = offer.split("/")[0] + "/*"
+    for candidate in (offer, type_wildcard, "*/*"):
+        matches = [q for media_range, q in ranges if media_range == candidate]
+        if matches:
+            return max(matches)
+    return 0.0
+
+
+def negotiate(request: Request, offers: Sequence[str] = MEDIA_TYPES) -> str:
+    """The offered media type the client accepts most, ties going to the first offer."""
+    header = request.headers.get("accept")
+    if not header:
+        return offers[0]
+    ranges = _accept_ranges(header)
+    best, best_q = None, 0.0
+    for offer in offers:
+        if offer == ARROW_STREAM and not arrow_available():
+            continue
+        q = _quality(offer, ranges)
+        if q > best_q:
+            best, best_q = offer, q
+    if best is None:
+        detail = f"Acceptable media types: {', '.join(offers)}"
+        if ARROW_STREAM in offers and not arrow_available():
+            detail += f" ({ARROW_STREAM} needs pyarrow installed on the server)"
+        raise HTTPException(status_code=406, detail=detail)
+    return best
+
+
+def nullable_list(values: np.ndarray) -> list:
+    """Array as a JSON-ready list: dates as ISO strings, NaN and masked values as None."""
+    if np.ma.isMaskedArray(values):
+        out = values.data.astype(object)
+        out[np.ma.getmaskarray(values)] = None
+        return out.tolist()
+    if np.issubdtype(values.dtype, np.datetime64):
+        return np.datetime_as_string(values, unit="D").tolist()
+    if np.issubdtype(values.dtype, np.floating):
+        out = values.astype(object)
+        out[np.isnan(values)] = None
+        return out.tolist()
+    return values.tolist()
+
+
+def columnar_json(columns: Dict[str, np.ndarray]) -> bytes:
+    return json.dumps(
+        {name: nullable_list(values) for name, values in columns.items()},
+        separators=(",", ":"),
+    ).encode()
+
+
+def arrow_stream(columns: Dict[str, np.ndarray], metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """
+    The columns as an Arrow IPC stream of one record batch: datetime64[D]
+    becomes date32, NaN and masked values become null. The arrays are handed
+    to Arrow as-is, without a per-value conversion.
+    """
+    import pyarrow as pa
+
+    batch = pa.RecordBatch.from_arrays(
+        [pa.array(values, from_pandas=True) for values in columns.values()],
+        names=list(columns),
+    )
+    if metadata:
+        batch = batch.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_columns(columns: Dict[str, np.ndarray], media_type: str,
+                   metadata: Optional[Dict[str, str]] = None) -> bytes:
+    """Body for COLUMNAR_JSON or ARROW_STREAM (metadata only applies to Arrow)."""
+    if media_type == ARROW_STREAM:
+        return arrow_stream(columns, metadata)
+    return columnar_json(columns)
@@ -1,12 +1,60 @@
 import os
+from functools import wraps
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(DATABASE_URL, echo=False)
+# Serve /stocks/volatility-metrics from the latest_volatility materialized view
+# refreshed by jobs/volatility.py (PostgreSQL only)
+USE_LATEST_VOLATILITY_VIEW = os.getenv("USE_LATEST_VOLATILITY_VIEW", "false").lower() in ("1", "true", "yes")
+
+# Rolling windows (trading days) accepted by /stocks/{symbol}/volatility/history;
+# must match VOLATILITY_WINDOWS in jobs/config.py, which fills volatility_timeseries
+VOLATILITY_WINDOWS = (20, 60, 252)
+
+# Response cache for read-only /stocks endpoints (app/core/cache.py)
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "3600"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "2048"))
+# How often the data_version stamp written by the jobs is re-read
+DATA_VERSION_CHECK_SECONDS = float(os.getenv("DATA_VERSION_CHECK_SECONDS", "10"))
+
+# Background news sentiment scoring (app/core/sentiment.py): titles are run
+# through the model in batches of up to SENTIMENT_BATCH_SIZE, waiting at most
+# SENTIMENT_MAX_WAIT_SECONDS for a batch to fill
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+SENTIMENT_MAX_WAIT_SECONDS = float(os.getenv("SENTIMENT_MAX_WAIT_SECONDS", "0.5"))
+# Model for the transformers sentiment-analysis pipeline (its default if unset).
+# The model is loaded on first use; SENTIMENT_PRELOAD warms it in the worker
+# thread right after startup instead, without delaying the server.
+SENTIMENT_MODEL = os.getenv("SENTIMENT_MODEL") or None
+SENTIMENT_PRELOAD = os.getenv("SENTIMENT_PRELOAD", "false").lower() in ("1", "true", "yes")
+# Unix socket of a shared inference process (python -m app.core.sentiment_server);
+# when set, API workers send titles there instead of loading the model themselves
+SENTIMENT_SOCKET = os.getenv("SENTIMENT_SOCKET") or None
+
+# /stocks/{symbol}/news refreshes (app/core/news.py): background refresh threads,
+# and the minimum time between two upstream fetches for the same symbol
+NEWS_REFRESH_WORKERS = int(os.getenv("NEWS_REFRESH_WORKERS", "4"))
+NEWS_MIN_REFRESH_SECONDS = float(os.getenv("NEWS_MIN_REFRESH_SECONDS", "300"))
+# Disable when jobs/news.py prefetches news on a schedule: the endpoint then only
+# reads stored articles and never calls Yahoo itself
+NEWS_FETCH_ON_REQUEST = os.getenv("NEWS_FETCH_ON_REQUEST", "true").lower() in ("1", "true", "yes")
+
+# Threads evaluating TA-Lib functions for /patterns/analyze/batch (TA-Lib releases the GIL)
+PATTERN_WORKERS = int(os.getenv("PATTERN_WORKERS", str(os.cpu_count() or 4)))
+# Largest /patterns/analyze/batch request accepted (413 beyond that)
+PATTERN_BATCH_MAX_SYMBOLS = int(os.getenv("PATTERN_BATCH_MAX_SYMBOLS", "100"))
+PATTERN_BATCH_MAX_PATTERNS = int(os.getenv("PATTERN_BATCH_MAX_PATTERNS", "50"))
+
+# Rows fetched per round trip from the server-side cursor behind /stocks/{symbol}/ohlc/stream
+OHLC_STREAM_BATCH_SIZE = int(os.getenv("OHLC_STREAM_BATCH_SIZE", "1000"))
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -15,3 +63,56 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Serve the read routes through an asyncio engine (asyncpg / aiosqlite) instead
+# of the blocking engine + threadpool
+ASYNC_DB = os.getenv("ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+def _async_url(url: str) -> str:
+    for sync_prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+    AsyncSessionLocal = sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session dependency for routes wrapped with db_route/cached: an AsyncSession
+# when ASYNC_DB is set, otherwise a regular Session
+get_session = get_async_db if ASYNC_DB else get_db
+
+async def run_sync(db, fn, *args, **kwargs):
+    """
+    Await fn(session, *args, **kwargs) for either session flavour: through
+    AsyncSession.run_sync (non-blocking driver I/O on the event loop) or on
+    the threadpool for a blocking Session.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+def db_route(func):
+    """
+    Turn a sync route handler taking `db` into a coroutine that runs it via
+    run_sync, so it works with Depends(get_session) in both modes. The
+    handler always sees a regular Session.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        db = kwargs.pop("db")
+        return await run_sync(db, lambda session: func(*args, db=session, **kwargs))
+    return wrapper
@@ -0,0 +1,129 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Hashable, Iterable
+
+import yfinance as yf
+
+from .config import NEWS_MIN_REFRESH_SECONDS, NEWS_REFRESH_WORKERS, SessionLocal
+from .. import crud, schemas
+
+
+def parse_news_items(stock_id: int, items: Iterable[dict]) -> list:
+    """yf.Ticker.news entries → NewsArticleCreate, skipping malformed ones."""
+    news = []
+    for article in items:
+        try:
+            news.append(schemas.NewsArticleCreate(
+                stock_id=stock_id,
+                title=article['content']['title'],
+                publisher=article['content']['provider']['displayName'],
+                link=article['content']['canonicalUrl']['url'],
+                published_date=datetime.fromisoformat(article['content']['pubDate'].split('T')[0]),
+                summary=article['content']['summary'],
+            ))
+        except KeyError as e:
+            print(f"Skipping article due to missing data: {e}")
+            continue
+        except Exception as e:
+            print(f"Error processing article: {e}")
+            continue
+    return news
+
+
+def refresh_stock_news(db, stock_id: int, symbol: str, ticker=None) -> list:
+    """
+    Fetch the symbol's news from Yahoo (or from `ticker`, anything with a
+    yf.Ticker-like .news), drop expired rows and store the articles unscored.
+    Returns the ids of newly inserted articles.
+    """
+    items = (ticker if ticker is not None else yf.Ticker(symbol)).news or []
+    crud.delete_old_news(db, stock_id)
+    return crud.create_news_articles(db, parse_news_items(stock_id, items))
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key: the first caller runs fn, the others
+    block until it finishes and share its result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class NewsRefresher:
+    """
+    Refreshes news for the API: at most one upstream fetch per symbol at a
+    time (SingleFlight) and none within `min_interval` seconds of the last
+    one. Ids of new articles are handed to `on_inserted` for scoring.
+    """
+
+    def __init__(
+        self,
+        on_inserted: Callable[[list], None],
+        max_workers: int = NEWS_REFRESH_WORKERS,
+        min_interval: float = NEWS_MIN_REFRESH_SECONDS,
+        session_factory=SessionLocal,
+    ):
+        self.on_inserted = on_inserted
+        self.min_interval = min_interval
+        self.session_factory = session_factory
+        self._flights = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-refresh")
+        self._refreshed_at = {}
+
+    def refresh(self, stock_id: int, symbol: str) -> None:
+        """Refresh now, or wait for the refresh already running for `symbol`."""
+        self._flights.do(symbol, lambda: self._refresh(stock_id, symbol))
+
+    def refresh_in_background(self, stock_id: int, symbol: str) -> None:
+        if not self._flights.in_flight(symbol):
+            self._executor.submit(self._refresh_logged, stock_id, symbol)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _refresh_logged(self, stock_id: int, symbol: str) -> None:
+        try:
+            self.refresh(stock_id, symbol)
+        except Exception as e:
+            print(f"[{symbol}] Error refreshing news: {e}")
+
+    def _refresh(self, stock_id: int, symbol: str) -> None:
+        last = self._refreshed_at.get(symbol)
+        if last is not None and time.monotonic() - last < self.min_interval:
+            return
+        db = self.session_factory()
+        try:
+            inserted_ids = refresh_stock_news(db, stock_id, symbol)
+        finally:
+            db.close()
+        self._refreshed_at[symbol] = time.monotonic()
+        self.on_inserted(inserted_ids)
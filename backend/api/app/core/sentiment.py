@@ -0,0 +1,227 @@
+import hashlib
+import json
+import queue
+import socket
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from .config import (
+    SENTIMENT_BATCH_SIZE,
+    SENTIMENT_MAX_WAIT_SECONDS,
+    SENTIMENT_MODEL,
+    SENTIMENT_PRELOAD,
+    SENTIMENT_SOCKET,
+    SessionLocal,
+)
+from .. import crud
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_model_state = {"status": "not_loaded", "error": None, "load_seconds": None}
+
+
+def load_sentiment_pipeline():
+    """
+    The shared transformers sentiment-analysis pipeline, built on first call.
+    transformers (and torch) are only imported here, so the API starts
+    without the NLP stack.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _model_state.update(status="loading", error=None)
+            started = time.monotonic()
+            try:
+                from transformers import pipeline
+                _pipeline = pipeline("sentiment-analysis", model=SENTIMENT_MODEL)
+            except Exception as e:
+                _model_state.update(status="error", error=str(e))
+                raise
+            _model_state.update(
+                status="ready",
+                error=None,
+                load_seconds=round(time.monotonic() - started, 2),
+            )
+    return _pipeline
+
+
+def sentiment_model_status() -> dict:
+    """not_loaded / loading / ready / error, plus the load time or error."""
+    return dict(_model_state)
+
+
+def title_hash(title: str) -> str:
+    """sentiment_cache key: the model name plus the whitespace-normalized title."""
+    normalized = " ".join(title.split())
+    return hashlib.sha256(f"{SENTIMENT_MODEL or 'default'}\0{normalized}".encode()).hexdigest()
+
+
+class RemoteClassifier:
+    """
+    Client for the shared inference process in app.core.sentiment_server,
+    called like a pipeline. Requests and replies are one JSON object per line.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _request(self, payload: dict, timeout: Optional[float] = None) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout or self.timeout)
+            sock.connect(self.socket_path)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(payload).encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline())
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+    def __call__(self, texts, **kwargs):
+        return self._request({"op": "classify", "texts": list(texts), "kwargs": kwargs})["results"]
+
+    def status(self) -> dict:
+        return self._request({"op": "status"}, timeout=2.0)["model"]
+
+
+class SentimentWorker:
+    """
+    Scores news_articles rows in the background. Article ids are queued with
+    submit(); a daemon thread collects up to `batch_size` of them (waiting at
+    most `max_wait` seconds after the first one arrives), runs the classifier
+    once over the batch of titles and writes label/score back to the rows.
+
+    `classifier` is anything called like a transformers pipeline:
+    classifier(list_of_texts) -> [{"label": ..., "score": ...}, ...].
+    When omitted it is a RemoteClassifier if SENTIMENT_SOCKET is set, else
+    load_sentiment_pipeline() on the first batch (or right after start()
+    with `preload`).
+
+    Titles already in sentiment_cache are not classified again, so a headline
+    syndicated across several tickers is scored once.
+    """
+
+    def __init__(
+        self,
+        classifier: Optional[Callable] = None,
+        batch_size: int = SENTIMENT_BATCH_SIZE,
+        max_wait: float = SENTIMENT_MAX_WAIT_SECONDS,
+        session_factory=SessionLocal,
+        preload: bool = SENTIMENT_PRELOAD,
+    ):
+        self.classifier = classifier
+        self.preload = preload
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[int]" = queue.Queue()
+        # Ids queued but not yet scored, so repeated reads don't re-queue them
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sentiment-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_classifier(self) -> Callable:
+        if self.classifier is None:
+            if SENTIMENT_SOCKET:
+                self.classifier = RemoteClassifier(SENTIMENT_SOCKET)
+            else:
+                self.classifier = load_sentiment_pipeline()
+        return self.classifier
+
+    def status(self) -> dict:
+        if self.classifier is None and SENTIMENT_SOCKET:
+            self.get_classifier()  # just the client; the model lives in the server
+        if isinstance(self.classifier, RemoteClassifier):
+            try:
+                model = self.classifier.status()
+            except (OSError, RuntimeError, ValueError) as e:
+                model = {"status": "unreachable", "error": str(e)}
+        elif self.classifier is not None and self.classifier is not _pipeline:
+            model = {"status": "ready"}  # injected classifier
+        else:
+            model = sentiment_model_status()
+        return {
+            "model": model,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "queued": self._queue.qsize(),
+        }
+
+    def submit(self, article_ids: Iterable[int]) -> None:
+        with self._pending_lock:
+            for article_id in article_ids:
+                if article_id not in self._pending:
+                    self._pending.add(article_id)
+                    self._queue.put(article_id)
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        if self.preload:
+            try:
+                self.get_classifier()
+            except Exception as e:
+                print(f"Error loading sentiment model: {e}")
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.score(batch)
+            except Exception as e:
+                print(f"Error scoring news sentiment: {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending.difference_update(batch)
+
+    def score(self, article_ids: list) -> int:
+        """Score the still-unscored articles among `article_ids`; returns how many."""
+        db = self.session_factory()
+        try:
+            articles = crud.get_unscored_news(db, article_ids)
+            if not articles:
+                return 0
+            hashes = [title_hash(a.title) for a in articles]
+            known = crud.get_cached_sentiments(db, list(set(hashes)))
+            missing = {}
+            for h, article in zip(hashes, articles):
+                if h not in known:
+                    missing.setdefault(h, article.title)
+            if missing:
+                results = self.get_classifier()(list(missing.values()), truncation=True)
+                fresh = dict(zip(missing, results))
+                crud.save_cached_sentiments(db, fresh)
+                known.update(fresh)
+            crud.update_news_sentiment(db, articles, [known[h] for h in hashes])
+            return len(articles)
+        finally:
+            db.close()
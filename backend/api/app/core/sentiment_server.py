@@ -0,0 +1,79 @@
+"""
+Shared sentiment inference process. Loads the model once and serves every
+API worker over a Unix socket, so each uvicorn worker no longer holds its own
+copy. Point the workers at it with SENTIMENT_SOCKET:
+
+    cd backend/api
+    python -m app.core.sentiment_server --socket /tmp/stock-sentiment.sock
+    SENTIMENT_SOCKET=/tmp/stock-sentiment.sock uvicorn app.main:app --workers 4
+
+Protocol (see RemoteClassifier): one JSON object per line in each direction.
+    {"op": "classify", "texts": [...], "kwargs": {...}} -> {"results": [{"label", "score"}, ...]}
+    {"op": "status"}                                    -> {"model": {...}}
+Failures come back as {"error": "..."}.
+"""
+import argparse
+import json
+import os
+import socketserver
+import threading
+
+from .config import SENTIMENT_SOCKET
+from .sentiment import load_sentiment_pipeline, sentiment_model_status
+
+DEFAULT_SOCKET = "/tmp/stock-sentiment.sock"
+
+
+class SentimentRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                reply = self.dispatch(json.loads(line))
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "status":
+            return {"model": sentiment_model_status()}
+        if op == "classify":
+            texts = request.get("texts") or []
+            if not texts:
+                return {"results": []}
+            # One batch through the model at a time; clients already send batches
+            with self.server.inference_lock:
+                results = load_sentiment_pipeline()(texts, **(request.get("kwargs") or {}))
+            return {
+                "results": [{"label": r["label"], "score": float(r["score"])} for r in results]
+            }
+        return {"error": f"unknown op: {op!r}"}
+
+
+class SentimentServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        self.inference_lock = threading.Lock()
+        super().__init__(socket_path, SentimentRequestHandler)
+
+
+def serve(socket_path):
+    # Load before binding: workers see the socket only once the model is ready
+    load_sentiment_pipeline()
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with SentimentServer(socket_path) as server:
+        print(f"Serving sentiment model on {socket_path}")
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared sentiment inference server.")
+    parser.add_argument("--socket", default=SENTIMENT_SOCKET or DEFAULT_SOCKET)
+    args = parser.parse_args()
+    serve(args.socket)
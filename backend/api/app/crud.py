@@ -1,6 +1,12 @@
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Optional
 from . import models, schemas
+from .core.config import USE_LATEST_VOLATILITY_VIEW
 
 def get_stock(db: Session, symbol: str):
     return db.query(models.Stock).filter(models.Stock.symbol == symbol).first()
@@ -8,45 +14,94 @@ def get_stock(db: Session, symbol: str):
 def get_stocks(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Stock).offset(skip).limit(limit).all()
 
+def daily_changes_query():
+    """Latest close vs the previous close for every stock, in one statement."""
+    ohlc = models.StockOHLC
+    ranked = (
+        select(
+            ohlc.stock_id,
+            ohlc.trade_date,
+            ohlc.close,
+            func.lag(ohlc.close).over(
+                partition_by=ohlc.stock_id, order_by=ohlc.trade_date
+            ).label("previous_close"),
+            func.row_number().over(
+                partition_by=ohlc.stock_id, order_by=ohlc.trade_date.desc()
+            ).label("rn"),
+        )
+        .subquery()
+    )
+    latest_price = cast(ranked.c.close, Float)
+    previous_price = cast(ranked.c.previous_close, Float)
+    price_change = latest_price - previous_price
+    return (
+        select(
+            models.Stock.symbol,
+            ranked.c.trade_date.label("latest_date"),
+            latest_price.label("latest_price"),
+            previous_price.label("previous_price"),
+            price_change.label("price_change"),
+            (price_change / previous_price * 100).label("percent_change"),
+        )
+        .join(ranked, ranked.c.stock_id == models.Stock.id)
+        .where(ranked.c.rn == 1, ranked.c.previous_close != 0)
+        .order_by(models.Stock.symbol)
+    )
+
 def get_daily_changes(db: Session):
     """Get the daily price changes for all stocks"""
-    changes = []
-    stocks = db.query(models.Stock).all()
-    
-    for stock in stocks:
-        latest_prices = (
-            db.query(models.StockOHLC)
-            .filter(models.StockOHLC.stock_id == stock.id)
-            .order_by(models.StockOHLC.trade_date.desc())
-            .limit(2)
-            .all()
+    return [dict(row._mapping) for row in db.execute(daily_changes_query())]
+
+def ohlc_query(
+    stock_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after: Optional[date] = None,
+    limit: Optional[int] = None,
+):
+    """
+    A stock's bars ordered by trade_date, prices cast to float in SQL.
+    `after` is the keyset cursor: the last trade_date of the previous page,
+    so each page is an index range scan on (stock_id, trade_date) however
+    deep it is.
+    """
+    ohlc = models.StockOHLC
+    stmt = (
+        select(
+            ohlc.trade_date,
+            cast(ohlc.open, Float).label("open"),
+            cast(ohlc.high, Float).label("high"),
+            cast(ohlc.low, Float).label("low"),
+            cast(ohlc.close, Float).label("close"),
+            ohlc.volume,
         )
-        
-        if len(latest_prices) >= 2:
-            latest = latest_prices[0]
-            previous = latest_prices[1]
-            
-            price_change = float(latest.close) - float(previous.close)
-            percent_change = (price_change / float(previous.close)) * 100
-            
-            changes.append({
-                "symbol": stock.symbol,
-                "latest_date": latest.trade_date,
-                "latest_price": float(latest.close),
-                "previous_price": float(previous.close),
-                "price_change": price_change,
-                "percent_change": percent_change
-            })
-    
-    return changes
-
-def get_ohlc(db: Session, stock_id: int):
-    return (
-        db.query(models.StockOHLC)
-          .filter(models.StockOHLC.stock_id == stock_id)
-          .order_by(models.StockOHLC.trade_date)
-          .all()
+        .where(ohlc.stock_id == stock_id)
+        .order_by(ohlc.trade_date)
     )
+    if start_date is not None:
+        stmt = stmt.where(ohlc.trade_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(ohlc.trade_date <= end_date)
+    if after is not None:
+        stmt = stmt.where(ohlc.trade_date > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def get_ohlc(db: Session, stock_id: int, start_date: Optional[date] = None,
+             end_date: Optional[date] = None, after: Optional[date] = None,
+             limit: Optional[int] = None):
+    return db.execute(ohlc_query(stock_id, start_date, end_date, after, limit)).all()
+
+def iter_ohlc(db: Session, stock_id: int, batch_size: int, start_date: Optional[date] = None,
+              end_date: Optional[date] = None, after: Optional[date] = None,
+              limit: Optional[int] = None):
+    """
+    get_ohlc in lists of up to batch_size rows, read through a server-side
+    cursor (yield_per), so memory stays flat however long the history is.
+    """
+    stmt = ohlc_query(stock_id, start_date, end_date, after, limit)
+    yield from db.execute(stmt.execution_options(yield_per=batch_size)).partitions()
 
 def get_dividends(db: Session, stock_id: int):
     return (
@@ -105,60 +160,235 @@ def get_volatility(db: Session, stock_id: int):
           .first()
     )
 
+# Sections of /stocks/{symbol}/bundle, each loaded by stock_id
+BUNDLE_SECTIONS = {
+    "ohlc": get_ohlc,
+    "dividends": get_dividends,
+    "splits": get_splits,
+    "info": get_info,
+    "fast_info": get_fast_info,
+    "income": lambda db, stock_id: get_financials(db, models.IncomeStatement, stock_id),
+    "balance": lambda db, stock_id: get_financials(db, models.BalanceSheet, stock_id),
+    "cashflow": lambda db, stock_id: get_financials(db, models.Cashflow, stock_id),
+    "earnings": get_earnings,
+    "earnings_calendar": get_calendar,
+    "filings": get_filings,
+    "volatility": get_volatility,
+    "sustainability": get_sustainability,
+}
+
+def get_stock_bundle(db: Session, stock: models.Stock, sections):
+    """Load the requested BUNDLE_SECTIONS for an already resolved stock"""
+    bundle = {"stock": stock}
+    for name in sections:
+        bundle[name] = BUNDLE_SECTIONS[name](db, stock.id)
+    return bundle
+
+def get_volatility_history(
+    db: Session,
+    stock_id: int,
+    window_days: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    vt = models.VolatilityTimeseries
+    query = db.query(vt.trade_date, vt.volatility, vt.beta).filter(
+        vt.stock_id == stock_id,
+        vt.window_days == window_days,
+    )
+    if start_date is not None:
+        query = query.filter(vt.trade_date >= start_date)
+    if end_date is not None:
+        query = query.filter(vt.trade_date <= end_date)
+    return query.order_by(vt.trade_date).all()
+
+def get_indicator_history(
+    db: Session,
+    stock_id: int,
+    columns: list,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+):
+    """
+    Stored indicator_values columns as {"dates": [...], "values": {column: [...]}},
+    NULL (warm-up) as None. One range scan of the (stock_id, trade_date) key.
+    """
+    iv = models.IndicatorValues
+    stmt = select(iv.trade_date, *(getattr(iv, c) for c in columns)).where(iv.stock_id == stock_id)
+    if start_date is not None:
+        stmt = stmt.where(iv.trade_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(iv.trade_date <= end_date)
+    rows = db.execute(stmt.order_by(iv.trade_date)).all()
+    dates, *series = zip(*rows) if rows else ((),) * (len(columns) + 1)
+    return {
+        "dates": list(dates),
+        "values": {column: list(values) for column, values in zip(columns, series)},
+    }
+
+def scan_pattern_signals(db: Session, patterns: list, since: date):
+    """
+    Every stored candlestick hit of `patterns` on or after `since`, newest
+    first. Served by the (pattern, trade_date) index of pattern_signals.
+    """
+    ps = models.PatternSignal
+    stmt = (
+        select(models.Stock.symbol, ps.pattern.label("pattern_name"), ps.trade_date, ps.value)
+        .join(models.Stock, models.Stock.id == ps.stock_id)
+        .where(ps.pattern.in_(patterns), ps.trade_date >= since)
+        .order_by(ps.trade_date.desc(), models.Stock.symbol, ps.pattern)
+    )
+    return db.execute(stmt).all()
+
+def latest_volatility_query(dialect_name: str):
+    """Latest VolatilityMetrics row per stock joined with its symbol."""
+    if USE_LATEST_VOLATILITY_VIEW and dialect_name == "postgresql":
+        view = models.latest_volatility
+        return select(*view.c).order_by(view.c.symbol)
+
+    vm = models.VolatilityMetrics
+    columns = (
+        models.Stock.symbol,
+        vm.calculation_date,
+        cast(vm.daily_volatility, Float).label("daily_volatility"),
+        cast(vm.annualized_volatility, Float).label("annualized_volatility"),
+        cast(vm.relative_volatility, Float).label("relative_volatility"),
+        cast(vm.beta, Float).label("beta"),
+        cast(vm.r_squared, Float).label("r_squared"),
+    )
+    if dialect_name == "postgresql":
+        latest = (
+            select(*columns)
+            .join(models.Stock, models.Stock.id == vm.stock_id)
+            .distinct(vm.stock_id)
+            .order_by(vm.stock_id, vm.calculation_date.desc())
+            .subquery()
+        )
+        return select(latest).order_by(latest.c.symbol)
+
+    ranked = (
+        select(
+            *columns,
+            func.row_number().over(
+                partition_by=vm.stock_id, order_by=vm.calculation_date.desc()
+            ).label("rn"),
+        )
+        .join(models.Stock, models.Stock.id == vm.stock_id)
+        .subquery()
+    )
+    return (
+        select(*[c for c in ranked.c if c.name != "rn"])
+        .where(ranked.c.rn == 1)
+        .order_by(ranked.c.symbol)
+    )
+
 def get_all_volatility_metrics(db: Session):
     """Get the latest volatility metrics for all stocks"""
-    stocks = db.query(models.Stock).all()
-    results = []
-    
-    for stock in stocks:
-        metrics = (
-            db.query(models.VolatilityMetrics)
-            .filter(models.VolatilityMetrics.stock_id == stock.id)
-            .order_by(models.VolatilityMetrics.calculation_date.desc())
-            .first()
+    stmt = latest_volatility_query(db.get_bind().dialect.name)
+    return [dict(row._mapping) for row in db.execute(stmt)]
+
+def ohlc_arrays_query(stock_ids: list, start_date: Optional[date] = None,
+                      end_date: Optional[date] = None, after: Optional[date] = None,
+                      null_volume: bool = False):
+    ohlc = models.StockOHLC
+    stmt = (
+        select(
+            ohlc.stock_id,
+            ohlc.trade_date,
+            cast(ohlc.open, Float),
+            cast(ohlc.high, Float),
+            cast(ohlc.low, Float),
+            cast(ohlc.close, Float),
+            ohlc.volume if null_volume else func.coalesce(ohlc.volume, 0),
         )
-        
-        if metrics:
-            results.append({
-                "symbol": stock.symbol,
-                "calculation_date": metrics.calculation_date,
-                "daily_volatility": float(metrics.daily_volatility),
-                "annualized_volatility": float(metrics.annualized_volatility),
-                "relative_volatility": float(metrics.relative_volatility) if metrics.relative_volatility else None,
-                "beta": float(metrics.beta) if metrics.beta else None,
-                "r_squared": float(metrics.r_squared) if metrics.r_squared else None
-            })
-    
-    return results
-
-def get_stock_ohlc_data(db: Session, symbol: str, start_date: datetime):
-    stock = get_stock(db, symbol)
-    if not stock:
-        return None
-    
-    return (
-        db.query(models.StockOHLC)
-          .filter(
-              models.StockOHLC.stock_id == stock.id,
-              models.StockOHLC.trade_date >= start_date
-          )
-          .order_by(models.StockOHLC.trade_date)
-          .all()
+        .where(ohlc.stock_id.in_(stock_ids))
+        .order_by(ohlc.stock_id, ohlc.trade_date)
     )
+    if start_date is not None:
+        stmt = stmt.where(ohlc.trade_date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(ohlc.trade_date <= end_date)
+    if after is not None:
+        stmt = stmt.where(ohlc.trade_date > after)
+    return stmt
 
-def get_news_by_stock(db: Session, stock_id: int, max_age_days: int = 1):
-    cutoff_date = datetime.now().date() - timedelta(days=max_age_days)
-    return db.query(models.NewsArticle).filter(
-        models.NewsArticle.stock_id == stock_id,
-        models.NewsArticle.cached_at >= cutoff_date
-    ).all()
+def _ohlc_columns(rows, null_volume: bool = False):
+    """ohlc_arrays_query rows → (stock_id array, get_ohlc_arrays columns)"""
+    ids, dates, opens, highs, lows, closes, volumes = zip(*rows) if rows else ((),) * 7
+    if null_volume:
+        volume = np.ma.MaskedArray(
+            np.array([v or 0 for v in volumes], dtype=np.int64),
+            mask=np.array([v is None for v in volumes], dtype=bool),
+        )
+    else:
+        volume = np.array(volumes, dtype=np.int64)
+    return np.array(ids, dtype=np.int64), {
+        "trade_date": np.array(dates, dtype="datetime64[D]"),
+        "open": np.array(opens, dtype=np.float64),
+        "high": np.array(highs, dtype=np.float64),
+        "low": np.array(lows, dtype=np.float64),
+        "close": np.array(closes, dtype=np.float64),
+        "volume": volume,
+    }
+
+def get_ohlc_arrays_by_stock(db: Session, stock_ids: list, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """
+    Bars for several stocks in one query, as {stock_id: columns} with the
+    same columns as get_ohlc_arrays (empty arrays for stocks without bars).
+    """
+    ids, columns = _ohlc_columns(db.execute(ohlc_arrays_query(stock_ids, start_date, end_date)).all())
+    by_stock = {stock_id: {k: v[:0] for k, v in columns.items()} for stock_id in stock_ids}
+    # Rows are ordered by stock_id, so each stock is one contiguous slice
+    bounds = np.flatnonzero(np.diff(ids)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(ids)]):
+        if hi > lo:
+            by_stock[int(ids[lo])] = {k: v[lo:hi] for k, v in columns.items()}
+    return by_stock
+
+def get_ohlc_arrays(db: Session, stock_id: int, start_date: Optional[date] = None,
+                    end_date: Optional[date] = None, after: Optional[date] = None,
+                    limit: Optional[int] = None, null_volume: bool = False):
+    """
+    A stock's bars as NumPy columns ordered by date: trade_date
+    (datetime64[D]), open/high/low/close (float64, NaN for NULL) and volume
+    (int64, 0 for NULL; with `null_volume` a masked array with NULLs masked,
+    for bodies that must report them as null). Prices are cast to float in
+    SQL, so no ORM objects or Decimals are built; use this for analytical
+    reads over long ranges. `after` and `limit` page like get_ohlc.
+    """
+    stmt = ohlc_arrays_query([stock_id], start_date, end_date, after, null_volume)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return _ohlc_columns(db.execute(stmt).all(), null_volume)[1]
 
-def create_news_article(db: Session, news: schemas.NewsArticleCreate):
-    db_news = models.NewsArticle(**news.dict(), cached_at=datetime.now().date())
-    db.add(db_news)
+def get_stocks_by_symbols(db: Session, symbols: list):
+    return db.query(models.Stock).filter(models.Stock.symbol.in_(symbols)).all()
+
+def get_news_by_stock(db: Session, stock_id: int, max_age_days: Optional[int] = 1):
+    """News cached within max_age_days, or of any age when max_age_days is None."""
+    query = db.query(models.NewsArticle).filter(models.NewsArticle.stock_id == stock_id)
+    if max_age_days is not None:
+        cutoff_date = datetime.now().date() - timedelta(days=max_age_days)
+        query = query.filter(models.NewsArticle.cached_at >= cutoff_date)
+    return query.all()
+
+def create_news_articles(db: Session, news: list):
+    """
+    Insert several articles in one INSERT ... ON CONFLICT (stock_id, link)
+    DO NOTHING; stories already stored (e.g. by a concurrent request) are
+    skipped by the database. Returns the ids of the rows actually inserted.
+    """
+    if not news:
+        return []
+    today = datetime.now().date()
+    stmt = (
+        insert_ignoring_conflicts(db, models.NewsArticle, ["stock_id", "link"])
+        .values([{**item.dict(), "cached_at": today} for item in news])
+        .returning(models.NewsArticle.id)
+    )
+    ids = list(db.scalars(stmt))
     db.commit()
-    db.refresh(db_news)
-    return db_news
+    return ids
 
 def delete_old_news(db: Session, stock_id: int, max_age_days: int = 1):
     cutoff_date = datetime.now().date() - timedelta(days=max_age_days)
@@ -167,3 +397,49 @@ def delete_old_news(db: Session, stock_id: int, max_age_days: int = 1):
         models.NewsArticle.cached_at < cutoff_date
     ).delete()
     db.commit()
+
+def get_unscored_news(db: Session, article_ids: list):
+    return db.query(models.NewsArticle).filter(
+        models.NewsArticle.id.in_(article_ids),
+        models.NewsArticle.sentiment_label.is_(None)
+    ).all()
+
+def update_news_sentiment(db: Session, articles: list, results: list):
+    """Store classifier outputs ({"label", "score"}) on the matching articles."""
+    for article, result in zip(articles, results):
+        article.sentiment_label = result["label"]
+        article.sentiment_score = float(result["score"])
+    db.commit()
+
+def insert_ignoring_conflicts(db: Session, model, index_elements: list):
+    """INSERT ... ON CONFLICT (index_elements) DO NOTHING for PostgreSQL/SQLite."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    return insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
+
+def get_cached_sentiments(db: Session, title_hashes: list):
+    """{title_hash: {"label", "score"}} for the hashes already in sentiment_cache."""
+    if not title_hashes:
+        return {}
+    rows = db.query(models.SentimentCache).filter(
+        models.SentimentCache.title_hash.in_(title_hashes)
+    ).all()
+    return {
+        row.title_hash: {"label": row.sentiment_label, "score": row.sentiment_score}
+        for row in rows
+    }
+
+def save_cached_sentiments(db: Session, results: dict):
+    """Add {title_hash: {"label", "score"}} to sentiment_cache; existing hashes are kept."""
+    if not results:
+        return
+    now = datetime.now()
+    stmt = insert_ignoring_conflicts(db, models.SentimentCache, ["title_hash"])
+    db.execute(stmt, [
+        {
+            "title_hash": title_hash,
+            "sentiment_label": result["label"],
+            "sentiment_score": float(result["score"]),
+            "created_at": now,
+        }
+        for title_hash, result in results.items()
+    ])
@@ -0,0 +1,403 @@
+"""
+Technical indicators with the standard parameters kept in indicator_values,
+and candlestick patterns kept in pattern_signals, both maintained by
+jobs/indicators.py and served by /patterns/indicators and /patterns/scan.
+
+Recursive indicators (EMA, RSI, ATR, OBV, MACD, ADX) are streaming state
+machines fed one bar at a time and reproduce TA-Lib's output over the full
+history. Their state after the last stored bar is saved with it, so a later
+run only feeds the new bars. Windowed indicators (SMA, BBANDS, STOCH) only
+depend on the last few bars and are recomputed with TA-Lib over a short tail.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+import talib
+
+NAN = float("nan")
+
+# Same defaults /patterns/analyze falls back to
+RSI_PERIOD = 14
+SMA_PERIOD = 14
+EMA_PERIOD = 14
+ADX_PERIOD = 14
+ATR_PERIOD = 14
+STOCH_FASTK_PERIOD = 14
+BBANDS_PERIOD = 20
+MACD_PERIODS = (12, 26, 9)
+
+INDICATOR_COLUMNS = (
+    "rsi",
+    "macd",
+    "macd_signal",
+    "macd_hist",
+    "stoch_slowk",
+    "stoch_slowd",
+    "sma",
+    "ema",
+    "adx",
+    "bbands_upper",
+    "bbands_middle",
+    "bbands_lower",
+    "atr",
+    "obv",
+)
+
+CANDLESTICK_PATTERNS = {
+    "cdl_doji": talib.CDLDOJI,
+    "cdl_hammer": talib.CDLHAMMER,
+    "cdl_engulfing": talib.CDLENGULFING,
+    "cdl_morning_star": talib.CDLMORNINGSTAR,
+    "cdl_evening_star": talib.CDLEVENINGSTAR,
+    "cdl_shooting_star": talib.CDLSHOOTINGSTAR,
+    "cdl_harami": talib.CDLHARAMI,
+    "cdl_dark_cloud_cover": talib.CDLDARKCLOUDCOVER,
+    "cdl_piercing": talib.CDLPIERCING,
+    "cdl_three_white_soldiers": talib.CDL3WHITESOLDIERS,
+    "cdl_three_black_crows": talib.CDL3BLACKCROWS,
+}
+
+# Bars before the first new one that the windowed indicators and candlestick
+# patterns need (STOCH 14/3/3 looks back 17 bars, BBANDS 19, SMA 13, the
+# candlestick functions at most 13)
+WINDOW_TAIL = 40
+
+
+def _is_zero(value):
+    # TA-Lib's TA_IS_ZERO
+    return -0.00000001 < value < 0.00000001
+
+
+def _true_range(high, low, prev_close):
+    result = high - low
+    if abs(high - prev_close) > result:
+        result = abs(high - prev_close)
+    if abs(low - prev_close) > result:
+        result = abs(low - prev_close)
+    return result
+
+
+class StreamingIndicator(ABC):
+    """
+    One bar in, one value per output name out (NaN during warm-up). State is
+    plain JSON-serializable attributes, saved with state() and restored with
+    from_state().
+    """
+
+    outputs = ()
+
+    @abstractmethod
+    def update(self, high, low, close, volume):
+        """Feed one bar; a tuple with one value per name in `outputs`."""
+
+    def state(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_state(cls, state):
+        indicator = cls.__new__(cls)
+        indicator.__dict__.update(state)
+        return indicator
+
+
+class EMA(StreamingIndicator):
+    """talib.EMA: seeded with the SMA of the first `period` closes."""
+
+    outputs = ("ema",)
+
+    def __init__(self, period=EMA_PERIOD):
+        self.period = period
+        self.seed = []
+        self.value = None
+
+    def update(self, high, low, close, volume):
+        k = 2.0 / (self.period + 1)
+        if self.value is None:
+            self.seed.append(close)
+            if len(self.seed) < self.period:
+                return (NAN,)
+            total = 0.0
+            for x in self.seed:
+                total += x
+            self.value = total / self.period
+            self.seed = []
+        else:
+            self.value = ((close - self.value) * k) + self.value
+        return (self.value,)
+
+
+class RSI(StreamingIndicator):
+    """talib.RSI: Wilder-smoothed average gain/loss."""
+
+    outputs = ("rsi",)
+
+    def __init__(self, period=RSI_PERIOD):
+        self.period = period
+        self.prev_close = None
+        self.count = 0
+        self.gain = 0.0
+        self.loss = 0.0
+
+    def update(self, high, low, close, volume):
+        if self.prev_close is None:
+            self.prev_close = close
+            return (NAN,)
+        diff = close - self.prev_close
+        self.prev_close = close
+        self.count += 1
+        if self.count <= self.period:
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+            if self.count < self.period:
+                return (NAN,)
+        else:
+            self.loss *= self.period - 1
+            self.gain *= self.period - 1
+            if diff < 0:
+                self.loss -= diff
+            else:
+                self.gain += diff
+        self.loss /= self.period
+        self.gain /= self.period
+        total = self.gain + self.loss
+        return (100.0 * (self.gain / total) if not _is_zero(total) else 0.0,)
+
+
+class ATR(StreamingIndicator):
+    """talib.ATR: SMA of the first `period` true ranges, then Wilder smoothing."""
+
+    outputs = ("atr",)
+
+    def __init__(self, period=ATR_PERIOD):
+        self.period = period
+        self.prev_close = None
+        self.seed = []
+        self.value = None
+
+    def update(self, high, low, close, volume):
+        if self.prev_close is None:
+            self.prev_close = close
+            return (NAN,)
+        tr = _true_range(high, low, self.prev_close)
+        self.prev_close = close
+        if self.value is None:
+            self.seed.append(tr)
+            if len(self.seed) < self.period:
+                return (NAN,)
+            total = 0.0
+            for x in self.seed:
+                total += x
+            self.value = total / self.period
+            self.seed = []
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return (self.value,)
+
+
+class OBV(StreamingIndicator):
+    """talib.OBV: running volume signed by the close-to-close direction."""
+
+    outputs = ("obv",)
+
+    def __init__(self):
+        self.prev_close = None
+        self.value = None
+
+    def update(self, high, low, close, volume):
+        if self.prev_close is None:
+            self.value = volume
+        elif close > self.prev_close:
+            self.value += volume
+        elif close < self.prev_close:
+            self.value -= volume
+        self.prev_close = close
+        return (self.value,)
+
+
+class MACD(StreamingIndicator):
+    """
+    talib.MACD: the fast and slow EMAs are both seeded at bar slow-1 (the
+    fast one with the SMA of its last `fast` closes), the signal EMA with the
+    SMA of the first `signal` MACD values.
+    """
+
+    outputs = ("macd", "macd_signal", "macd_hist")
+
+    def __init__(self, fast=MACD_PERIODS[0], slow=MACD_PERIODS[1], signal=MACD_PERIODS[2]):
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self.closes = []
+        self.fast_ema = None
+        self.slow_ema = None
+        self.macds = []
+        self.signal_ema = None
+
+    def update(self, high, low, close, volume):
+        if self.slow_ema is None:
+            self.closes.append(close)
+            if len(self.closes) < self.slow:
+                return (NAN, NAN, NAN)
+            self.slow_ema = _mean(self.closes)
+            self.fast_ema = _mean(self.closes[-self.fast:])
+            self.closes = []
+        else:
+            self.slow_ema = ((close - self.slow_ema) * (2.0 / (self.slow + 1))) + self.slow_ema
+            self.fast_ema = ((close - self.fast_ema) * (2.0 / (self.fast + 1))) + self.fast_ema
+        macd = self.fast_ema - self.slow_ema
+        if self.signal_ema is None:
+            self.macds.append(macd)
+            if len(self.macds) < self.signal:
+                return (NAN, NAN, NAN)
+            self.signal_ema = _mean(self.macds)
+            self.macds = []
+        else:
+            self.signal_ema = ((macd - self.signal_ema) * (2.0 / (self.signal + 1))) + self.signal_ema
+        return (macd, self.signal_ema, macd - self.signal_ema)
+
+
+class ADX(StreamingIndicator):
+    """
+    talib.ADX: directional movement and true range summed over period-1 bars,
+    Wilder-smoothed from then on; the first ADX is the mean DX of the next
+    `period` bars, then Wilder-smoothed.
+    """
+
+    outputs = ("adx",)
+
+    def __init__(self, period=ADX_PERIOD):
+        self.period = period
+        self.prev_high = None
+        self.prev_low = None
+        self.prev_close = None
+        self.count = 0
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.value = None
+
+    def update(self, high, low, close, volume):
+        period = self.period
+        if self.prev_high is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return (NAN,)
+        self.count += 1
+        diff_p = high - self.prev_high
+        diff_m = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+        smoothing = self.count >= period
+        if smoothing:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+        if diff_m > 0 and diff_p < diff_m:
+            self.minus_dm += diff_m
+        elif diff_p > 0 and diff_p > diff_m:
+            self.plus_dm += diff_p
+        tr = _true_range(high, low, self.prev_close)
+        self.tr = self.tr - (self.tr / period) + tr if smoothing else self.tr + tr
+        self.prev_close = close
+        if not smoothing:
+            return (NAN,)
+
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di = 100.0 * (self.plus_dm / self.tr)
+            total = minus_di + plus_di
+            if not _is_zero(total):
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+        if self.value is None:
+            if dx is not None:
+                self.sum_dx += dx
+            if self.count < 2 * period - 1:
+                return (NAN,)
+            self.value = self.sum_dx / period
+        elif dx is not None:
+            self.value = ((self.value * (period - 1)) + dx) / period
+        return (self.value,)
+
+
+def _mean(values):
+    total = 0.0
+    for x in values:
+        total += x
+    return total / len(values)
+
+
+STREAMING_INDICATORS = {
+    "ema": EMA,
+    "rsi": RSI,
+    "atr": ATR,
+    "obv": OBV,
+    "macd": MACD,
+    "adx": ADX,
+}
+
+
+def new_streams():
+    return {name: cls() for name, cls in STREAMING_INDICATORS.items()}
+
+
+def save_streams(streams):
+    return {name: stream.state() for name, stream in streams.items()}
+
+
+def load_streams(state):
+    return {name: STREAMING_INDICATORS[name].from_state(s) for name, s in state.items()}
+
+
+def windowed_outputs(bars):
+    """SMA, BBANDS and STOCH with the standard parameters via TA-Lib."""
+    high, low, close = bars["high"], bars["low"], bars["close"]
+    upper, middle, lower = talib.BBANDS(close, timeperiod=BBANDS_PERIOD)
+    slowk, slowd = talib.STOCH(high, low, close, fastk_period=STOCH_FASTK_PERIOD)
+    return {
+        "sma": talib.SMA(close, timeperiod=SMA_PERIOD),
+        "bbands_upper": upper,
+        "bbands_middle": middle,
+        "bbands_lower": lower,
+        "stoch_slowk": slowk,
+        "stoch_slowd": slowd,
+    }
+
+
+def update_indicators(bars, streams, skip=0):
+    """
+    INDICATOR_COLUMNS for bars[skip:] (get_ohlc_arrays columns). `streams`
+    must already have consumed bars[:skip], which only serve as context for
+    the windowed indicators (pass at least WINDOW_TAIL of them); the streams
+    are advanced in place.
+    """
+    highs = bars["high"].tolist()
+    lows = bars["low"].tolist()
+    closes = bars["close"].tolist()
+    volumes = bars["volume"].astype(np.float64).tolist()
+    count = len(closes) - skip
+    out = {column: np.full(count, np.nan) for column in INDICATOR_COLUMNS}
+    for i in range(skip, len(closes)):
+        for stream in streams.values():
+            values = stream.update(highs[i], lows[i], closes[i], volumes[i])
+            for column, value in zip(stream.outputs, values):
+                out[column][i - skip] = value
+    if len(closes):
+        for column, series in windowed_outputs(bars).items():
+            out[column] = series[skip:]
+    return out
+
+
+def candlestick_signals(bars, skip=0):
+    """
+    Non-zero CANDLESTICK_PATTERNS outputs for bars[skip:], as (index into
+    bars[skip:], pattern, value) tuples ordered by index. bars[:skip] is
+    context only, as for update_indicators.
+    """
+    hits = []
+    for pattern, func in CANDLESTICK_PATTERNS.items():
+        values = func(bars["open"], bars["high"], bars["low"], bars["close"])[skip:]
+        for i in np.flatnonzero(values).tolist():
+            hits.append((i, pattern, int(values[i])))
+    hits.sort(key=lambda hit: hit[0])
+    return hits
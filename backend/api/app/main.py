@@ -25,5 +25,19 @@ app.include_router(auth.router)
 app.include_router(stocks.router)
 app.include_router(patterns.router)
 
+@app.get("/health", tags=["health"])
+def health():
+    """Liveness plus sentiment model readiness; news is served before the model is ready."""
+    return {"status": "ok", "sentiment": stocks.sentiment_worker.status()}
+
+@app.on_event("startup")
+def start_sentiment_worker():
+    stocks.sentiment_worker.start()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    stocks.news_refresher.shutdown()
+    stocks.sentiment_worker.stop()
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import (
-    Column, Integer, String, Date, Numeric, BigInteger, Text, JSON, ForeignKey
+    Column, Integer, String, Date, Numeric, BigInteger, Text, JSON, ForeignKey,
+    Float, Boolean, DateTime, Index, UniqueConstraint, column, table, false
 )
 from sqlalchemy.orm import relationship, sessionmaker
 from .core.config import engine
@@ -27,6 +28,7 @@ class Stock(Base):
     filings        = relationship("SecFiling", back_populates="stock")
     sustainability = relationship("SustainabilityMetric", uselist=False, back_populates="stock")
     volatility_metrics = relationship("VolatilityMetrics", back_populates="stock")
+    volatility_timeseries = relationship("VolatilityTimeseries", back_populates="stock")
 
 class StockOHLC(Base):
     __tablename__ = "stock_ohlc"
@@ -51,6 +53,8 @@ class StockSplit(Base):
     stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
     split_date = Column(Date, primary_key=True)
     ratio      = Column(Numeric)
+    # Set once the stored OHLC has been reloaded (split-adjusted) after this split was recorded
+    prices_adjusted = Column(Boolean, nullable=False, server_default=false())
     stock      = relationship("Stock", back_populates="splits")
 
 class StockInfo(Base):
@@ -125,8 +129,87 @@ class VolatilityMetrics(Base):
     r_squared = Column(Numeric)
     stock = relationship("Stock", back_populates="volatility_metrics")
 
+class VolatilityTimeseries(Base):
+    __tablename__ = "volatility_timeseries"
+    stock_id    = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    window_days = Column(Integer, primary_key=True)  # 20, 60 or 252 trading days
+    trade_date  = Column(Date, primary_key=True)
+    volatility  = Column(Float)  # Annualized, NULL until the window is full
+    beta        = Column(Float)
+    # Running sums over the window (x = stock, y = benchmark log returns)
+    n      = Column(Integer)
+    sum_x  = Column(Float)
+    sum_y  = Column(Float)
+    sum_xx = Column(Float)
+    sum_yy = Column(Float)
+    sum_xy = Column(Float)
+    # Stock close on trade_date: a later run continues from these sums only if it is unchanged
+    close  = Column(Float)
+    stock  = relationship("Stock", back_populates="volatility_timeseries")
+
+class IndicatorValues(Base):
+    """Standard-parameter indicators per bar (see app/indicators.py), NULL during warm-up."""
+    __tablename__ = "indicator_values"
+    stock_id      = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    trade_date    = Column(Date, primary_key=True)
+    rsi           = Column(Float)
+    macd          = Column(Float)
+    macd_signal   = Column(Float)
+    macd_hist     = Column(Float)
+    stoch_slowk   = Column(Float)
+    stoch_slowd   = Column(Float)
+    sma           = Column(Float)
+    ema           = Column(Float)
+    adx           = Column(Float)
+    bbands_upper  = Column(Float)
+    bbands_middle = Column(Float)
+    bbands_lower  = Column(Float)
+    atr           = Column(Float)
+    obv           = Column(Float)
+
+class IndicatorState(Base):
+    """Streaming indicator state after last_date, continued by the next indicator run."""
+    __tablename__ = "indicator_state"
+    stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    last_date  = Column(Date, nullable=False)
+    last_close = Column(Float, nullable=False)  # Detects rewritten history (e.g. split adjustments)
+    state      = Column(JSON, nullable=False)
+
+class PatternSignal(Base):
+    """Non-zero candlestick pattern outputs (app/indicators.py CANDLESTICK_PATTERNS)."""
+    __tablename__ = "pattern_signals"
+    __table_args__ = (
+        # Cross-sectional scans: which stocks printed a pattern since a date
+        Index("ix_pattern_signals_pattern_trade_date", "pattern", "trade_date"),
+    )
+    stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    trade_date = Column(Date, primary_key=True)
+    pattern    = Column(String, primary_key=True)  # e.g. cdl_hammer
+    value      = Column(Integer, nullable=False)  # TA-Lib output: ±100 (±200 when confirmed)
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+    id         = Column(Integer, primary_key=True)  # Single row, id = 1
+    version    = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+# Materialized view created and refreshed by jobs/volatility.py, not by init_db
+latest_volatility = table(
+    "latest_volatility",
+    column("symbol", String),
+    column("calculation_date", Date),
+    column("daily_volatility", Float),
+    column("annualized_volatility", Float),
+    column("relative_volatility", Float),
+    column("beta", Float),
+    column("r_squared", Float),
+)
+
 class NewsArticle(Base):
     __tablename__ = "news_articles"
+    __table_args__ = (
+        UniqueConstraint("stock_id", "link", name="uq_news_articles_stock_id_link"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     stock_id = Column(Integer, ForeignKey("stocks.id"))
     title = Column(String)
@@ -139,6 +222,14 @@ class NewsArticle(Base):
     cached_at = Column(Date)
     stock = relationship("Stock", backref="news")
 
+class SentimentCache(Base):
+    """Sentiment per distinct headline, keyed by app.core.sentiment.title_hash."""
+    __tablename__ = "sentiment_cache"
+    title_hash      = Column(String(64), primary_key=True)
+    sentiment_label = Column(String, nullable=False)
+    sentiment_score = Column(Float, nullable=False)
+    created_at      = Column(DateTime)
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
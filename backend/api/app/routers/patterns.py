@@ -1,13 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-import pandas as pd
+from fastapi.responses import JSONResponse
+import numpy as np
 import talib
-from typing import List
-from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Union
+from datetime import date, datetime, timedelta
 
-from ..dependencies import get_db
-from ..schemas import PatternRequest, PatternMatch, PatternList
-from ..crud import get_stock_ohlc_data
+from ..core.cache import cached
+from ..core.columnar import (
+    ARROW_STREAM,
+    COLUMNAR_JSON,
+    COLUMNAR_RESPONSES,
+    JSON,
+    arrow_stream,
+    negotiate,
+    nullable_list,
+)
+from ..core.config import (
+    PATTERN_BATCH_MAX_PATTERNS,
+    PATTERN_BATCH_MAX_SYMBOLS,
+    PATTERN_WORKERS,
+    db_route,
+    get_session,
+    run_sync,
+)
+from ..indicators import CANDLESTICK_PATTERNS, INDICATOR_COLUMNS
+from ..schemas import (
+    IndicatorColumns,
+    PatternBatchRequest,
+    PatternRequest,
+    PatternColumns,
+    PatternMatch,
+    PatternList,
+    PatternSignal,
+    SymbolPatternMatches,
+)
+from ..crud import (
+    get_indicator_history,
+    get_ohlc_arrays,
+    get_ohlc_arrays_by_stock,
+    get_stock,
+    get_stocks_by_symbols,
+    scan_pattern_signals,
+)
 
 router = APIRouter(
     prefix="/patterns",
@@ -15,17 +52,8 @@ router = APIRouter(
 )
 
 SUPPORTED_PATTERNS = {
-    "cdl_doji": talib.CDLDOJI,
-    "cdl_hammer": talib.CDLHAMMER,
-    "cdl_engulfing": talib.CDLENGULFING,
-    "cdl_morning_star": talib.CDLMORNINGSTAR,
-    "cdl_evening_star": talib.CDLEVENINGSTAR,
-    "cdl_shooting_star": talib.CDLSHOOTINGSTAR,
-    "cdl_harami": talib.CDLHARAMI,
-    "cdl_dark_cloud_cover": talib.CDLDARKCLOUDCOVER,
-    "cdl_piercing": talib.CDLPIERCING,
-    "cdl_three_white_soldiers": talib.CDL3WHITESOLDIERS,
-    "cdl_three_black_crows": talib.CDL3BLACKCROWS,
+    # Also scanned for every stock by jobs/indicators.py into pattern_signals
+    **CANDLESTICK_PATTERNS,
     "rsi": talib.RSI,
     "macd": talib.MACD,
     "stochastic": talib.STOCH,
@@ -42,70 +70,238 @@ def list_supported_patterns():
     """List all supported technical analysis patterns."""
     return {"patterns": list(SUPPORTED_PATTERNS.keys())}
 
-@router.post("/analyze", response_model=List[PatternMatch])
-def analyze_pattern(request: PatternRequest, db: Session = Depends(get_db)):
-    """Analyze a specific pattern for a given stock symbol."""
+def compute_outputs(pattern_name: str, bars: dict, lookback_period: int) -> Dict[str, np.ndarray]:
+    """
+    Every output of one SUPPORTED_PATTERNS function over get_ohlc_arrays()
+    columns: {"value": ...} for single-output functions, macd/signal/hist for
+    MACD, slowk/slowd for STOCH and upper/middle/lower for BBANDS.
+    """
+    pattern_func = SUPPORTED_PATTERNS[pattern_name]
+    open_arr = bars['open']
+    high_arr = bars['high']
+    low_arr = bars['low']
+    close_arr = bars['close']
+    # TA-Lib's volume inputs take doubles
+    volume_arr = bars['volume'].astype(float)
+
+    if pattern_name.startswith('cdl_'):
+        return {"value": pattern_func(open_arr, high_arr, low_arr, close_arr)}
+    elif pattern_name in ['rsi', 'sma', 'ema']:
+        return {"value": pattern_func(close_arr, timeperiod=lookback_period or 14)}
+    elif pattern_name in ['adx', 'atr']:
+        # talib.ADX needs high/low/close like ATR; given close alone it raises TypeError
+        return {"value": pattern_func(high_arr, low_arr, close_arr,
+                                      timeperiod=lookback_period or 14)}
+    elif pattern_name == 'macd':
+        macd, signal, hist = pattern_func(close_arr, 
+                                        fastperiod=12, 
+                                        slowperiod=26, 
+                                        signalperiod=9)
+        return {"macd": macd, "signal": signal, "hist": hist}
+    elif pattern_name == 'stochastic':
+        slowk, slowd = pattern_func(high_arr, low_arr, close_arr,
+                                  fastk_period=lookback_period or 14)
+        return {"slowk": slowk, "slowd": slowd}
+    elif pattern_name == 'bollinger_bands':
+        upper, middle, lower = pattern_func(close_arr, 
+                                          timeperiod=lookback_period or 20)
+        return {"upper": upper, "middle": middle, "lower": lower}
+    elif pattern_name == 'obv':
+        return {"value": pattern_func(close_arr, volume_arr)}
+
+def signal_values(pattern_name: str, outputs: Dict[str, np.ndarray]) -> np.ndarray:
+    """The single series reported as signal_value by /patterns/analyze."""
+    if pattern_name == 'macd':
+        return outputs["macd"]
+    if pattern_name == 'stochastic':
+        return outputs["slowk"]
+    if pattern_name == 'bollinger_bands':
+        return outputs["upper"] - outputs["lower"]
+    return outputs["value"]
+
+def compute_pattern(pattern_name: str, bars: dict, lookback_period: int) -> np.ndarray:
+    return signal_values(pattern_name, compute_outputs(pattern_name, bars, lookback_period))
+
+def pattern_matches(pattern_name: str, bars: dict, result) -> List[dict]:
+    """PatternMatch dicts for the bars where the signal is set and non-zero."""
+    values = np.asarray(result, dtype=np.float64)
+    hits = np.flatnonzero(~np.isnan(values) & (values != 0))
+    return [
+        {"pattern_name": pattern_name, "timestamp": ts, "signal_value": value}
+        for ts, value in zip(bars['trade_date'][hits].tolist(), values[hits].tolist())
+    ]
+
+def pattern_columns(pattern_name: str, bars: dict, outputs: Dict[str, np.ndarray]) -> dict:
+    """Columnar /patterns/analyze body: one date per bar and every output series."""
+    return {
+        "pattern_name": pattern_name,
+        "dates": nullable_list(bars['trade_date']),
+        "values": {name: nullable_list(series) for name, series in outputs.items()},
+    }
+
+def analyze_bars(symbol: str, bars: dict, pattern_names: List[str], lookback_period: int) -> SymbolPatternMatches:
+    """All requested patterns for one symbol; a failing pattern doesn't fail the others."""
+    matches, errors = {}, {}
+    for pattern_name in pattern_names:
+        try:
+            result = compute_pattern(pattern_name, bars, lookback_period)
+            matches[pattern_name] = pattern_matches(pattern_name, bars, result)
+        except Exception as e:
+            errors[pattern_name] = f"Error calculating pattern: {str(e)}"
+    return SymbolPatternMatches(symbol=symbol, matches=matches, errors=errors)
+
+# Shared by batch requests; bounds TA-Lib work across concurrent requests too
+_executor = ThreadPoolExecutor(max_workers=PATTERN_WORKERS, thread_name_prefix="patterns")
+
+@router.post("/analyze", response_model=Union[List[PatternMatch], PatternColumns],
+             responses=COLUMNAR_RESPONSES)
+@db_route
+def analyze_pattern(request: PatternRequest, http_request: Request, db: Session = Depends(get_session)):
+    """
+    Analyze a specific pattern for a given stock symbol. format="columnar"
+    (or Accept: application/x-columnar+json) returns the full series of every
+    indicator output instead of one object per non-zero bar; Accept:
+    application/vnd.apache.arrow.stream returns the same columns plus
+    trade_date as an Arrow IPC stream.
+    """
     if request.pattern_name not in SUPPORTED_PATTERNS:
         raise HTTPException(status_code=400, detail="Pattern not supported")
+    media_type = negotiate(http_request)
     
-    ohlc_data = get_stock_ohlc_data(db, request.symbol, 
-                                   datetime.now() - timedelta(days=request.lookback_period))
-    
-    if not ohlc_data:
+    stock = get_stock(db, request.symbol)
+    if not stock:
         raise HTTPException(status_code=404, detail="No data found for symbol")
+    bars = get_ohlc_arrays(db, stock.id,
+                           datetime.now() - timedelta(days=request.lookback_period))
     
-    df = pd.DataFrame([{
-        'datetime': d.trade_date,
-        'open': float(d.open),
-        'high': float(d.high),
-        'low': float(d.low),
-        'close': float(d.close),
-        'volume': int(d.volume)
-    } for d in ohlc_data])
+    if not len(bars['close']):
+        raise HTTPException(status_code=404, detail="No data found for symbol")
     
-    pattern_func = SUPPORTED_PATTERNS[request.pattern_name]
     try:
-        open_arr = df['open'].values
-        high_arr = df['high'].values
-        low_arr = df['low'].values
-        close_arr = df['close'].values
-        volume_arr = df['volume'].values
-        
-        if request.pattern_name.startswith('cdl_'):
-            result = pattern_func(open_arr, high_arr, low_arr, close_arr)
-        elif request.pattern_name in ['rsi', 'sma', 'ema', 'adx']:
-            result = pattern_func(close_arr, timeperiod=request.lookback_period or 14)
-        elif request.pattern_name == 'macd':
-            macd, signal, hist = pattern_func(close_arr, 
-                                            fastperiod=12, 
-                                            slowperiod=26, 
-                                            signalperiod=9)
-            result = macd
-        elif request.pattern_name == 'stochastic':
-            slowk, slowd = pattern_func(high_arr, low_arr, close_arr,
-                                      fastk_period=request.lookback_period or 14)
-            result = slowk
-        elif request.pattern_name == 'bollinger_bands':
-            upper, middle, lower = pattern_func(close_arr, 
-                                              timeperiod=request.lookback_period or 20)
-            result = upper - lower
-        elif request.pattern_name == 'atr':
-            result = pattern_func(high_arr, low_arr, close_arr,
-                                timeperiod=request.lookback_period or 14)
-        elif request.pattern_name == 'obv':
-            result = pattern_func(close_arr, volume_arr)
-            
-        matches = []
-        for idx, value in enumerate(result):
-            if pd.notna(value) and value != 0:
-                matches.append(PatternMatch(
-                    pattern_name=request.pattern_name,
-                    timestamp=df['datetime'].iloc[idx],
-                    signal_value=float(value)
-                ))
-        
-        return matches
+        outputs = compute_outputs(request.pattern_name, bars, request.lookback_period)
+        if media_type == ARROW_STREAM:
+            return Response(
+                arrow_stream({"trade_date": bars['trade_date'], **outputs},
+                             metadata={"pattern_name": request.pattern_name}),
+                media_type=ARROW_STREAM,
+            )
+        if request.format == "columnar" or media_type == COLUMNAR_JSON:
+            # Already JSON-ready; skip per-element response_model validation
+            return JSONResponse(
+                pattern_columns(request.pattern_name, bars, outputs),
+                media_type=COLUMNAR_JSON if media_type == COLUMNAR_JSON else JSON,
+            )
+        return pattern_matches(request.pattern_name, bars,
+                               signal_values(request.pattern_name, outputs))
         
     except Exception as e:
         raise HTTPException(status_code=500, 
-                          detail=f"Error calculating pattern: {str(e)}")
\ No newline at end of file
+                          detail=f"Error calculating pattern: {str(e)}")
+
+def load_batch_bars(db: Session, symbols: List[str], start_date: datetime):
+    """{symbol: columns} for the symbols that exist, read in one query."""
+    stocks = get_stocks_by_symbols(db, symbols)
+    bars = get_ohlc_arrays_by_stock(db, [s.id for s in stocks], start_date)
+    return {s.symbol: bars[s.id] for s in stocks}
+
+@router.post("/analyze/batch", response_model=List[SymbolPatternMatches])
+async def analyze_patterns_batch(request: PatternBatchRequest, db: Session = Depends(get_session)):
+    """
+    Several patterns for several symbols in one call. Each symbol's OHLC is
+    read once, and symbols are evaluated in parallel on a thread pool.
+    Results come back in request order, one entry per symbol. At most
+    PATTERN_BATCH_MAX_SYMBOLS symbols and PATTERN_BATCH_MAX_PATTERNS patterns
+    per request (413 otherwise).
+    """
+    for field, items, limit in (
+        ("symbols", request.symbols, PATTERN_BATCH_MAX_SYMBOLS),
+        ("pattern_names", request.pattern_names, PATTERN_BATCH_MAX_PATTERNS),
+    ):
+        if len(items) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Too many {field}: {len(items)} (at most {limit} per request)",
+            )
+    unsupported = [p for p in request.pattern_names if p not in SUPPORTED_PATTERNS]
+    if unsupported:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pattern not supported: {', '.join(unsupported)}",
+        )
+    symbols = list(dict.fromkeys(s.upper() for s in request.symbols))
+    pattern_names = list(dict.fromkeys(request.pattern_names))
+
+    start_date = datetime.now() - timedelta(days=request.lookback_period)
+    bars = await run_sync(db, load_batch_bars, symbols, start_date)
+
+    loop = asyncio.get_running_loop()
+    pending = {
+        symbol: loop.run_in_executor(
+            _executor, analyze_bars, symbol, bars[symbol], pattern_names, request.lookback_period
+        )
+        for symbol in symbols
+        if symbol in bars and len(bars[symbol]['close'])
+    }
+    done = dict(zip(pending, await asyncio.gather(*pending.values())))
+    return [
+        done.get(symbol) or SymbolPatternMatches(symbol=symbol, error="No data found for symbol")
+        for symbol in symbols
+    ]
+
+@router.get("/indicators/{symbol}", response_model=IndicatorColumns)
+@cached(IndicatorColumns)
+def read_indicators(
+    symbol: str,
+    names: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Precomputed standard-parameter indicators (RSI/SMA/EMA/ADX/ATR 14,
+    MACD 12/26/9, STOCH 14/3/3, BBANDS 20/2, OBV) over the stock's full
+    history, maintained by jobs/indicators.py after each ingest. `names` is a
+    comma-separated subset of the indicator_values columns (all when omitted).
+    """
+    if names:
+        columns = list(dict.fromkeys(n.strip() for n in names.split(",") if n.strip()))
+        unknown = [c for c in columns if c not in INDICATOR_COLUMNS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown indicators: {', '.join(unknown)}",
+            )
+    else:
+        columns = list(INDICATOR_COLUMNS)
+    stock = get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="No data found for symbol")
+    return {"symbol": stock.symbol, **get_indicator_history(db, stock.id, columns, start, end)}
+
+@router.get("/scan", response_model=List[PatternSignal])
+@db_route
+def scan_patterns(
+    patterns: Optional[str] = None,
+    days: int = 5,
+    since: Optional[date] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Which stocks printed the given candlestick patterns (comma-separated
+    cdl_* names, all when omitted) in the last `days` days, or since `since`.
+    Reads the pattern_signals table kept by jobs/indicators.py, so the whole
+    universe is answered by one indexed query.
+    """
+    if patterns:
+        names = list(dict.fromkeys(p.strip() for p in patterns.split(",") if p.strip()))
+        unknown = [p for p in names if p not in CANDLESTICK_PATTERNS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown candlestick patterns: {', '.join(unknown)}",
+            )
+    else:
+        names = list(CANDLESTICK_PATTERNS)
+    if since is None:
+        since = date.today() - timedelta(days=days)
+    return scan_pattern_signals(db, names, since)
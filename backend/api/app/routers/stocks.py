@@ -1,15 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from transformers import pipeline
-import yfinance as yf
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, datetime, timedelta
+from typing import List, Optional
 
-from ..core.config import get_db
+from ..core.config import (
+    NEWS_FETCH_ON_REQUEST,
+    OHLC_STREAM_BATCH_SIZE,
+    SessionLocal,
+    VOLATILITY_WINDOWS,
+    get_db,
+    get_session,
+)
+from ..core.cache import cached, cached_response
+from ..core.columnar import COLUMNAR_RESPONSES, JSON, encode_columns, negotiate
+from ..core.news import NewsRefresher
+from ..core.sentiment import SentimentWorker
 from ..core.security import get_current_user
 from .. import schemas, crud, models
 
-sentiment_analyzer = pipeline("sentiment-analysis")
+# Started/stopped with the app (main.py); scores articles off the request path.
+# The model is loaded lazily by the worker, not when this module is imported.
+sentiment_worker = SentimentWorker()
+news_refresher = NewsRefresher(on_inserted=sentiment_worker.submit)
 
 router = APIRouter(
     prefix="/stocks",
@@ -18,49 +32,176 @@ router = APIRouter(
 )
 
 @router.get("/volatility-metrics", response_model=list[schemas.StockVolatilityMetrics])
-def read_all_volatility_metrics(db: Session = Depends(get_db)):
+@cached(list[schemas.StockVolatilityMetrics])
+def read_all_volatility_metrics(db: Session = Depends(get_session)):
     """Get volatility metrics for all stocks"""
     return crud.get_all_volatility_metrics(db)
 
 @router.get("/daily-changes", response_model=list[schemas.DailyChange])
-def read_daily_changes(db: Session = Depends(get_db)):
+@cached(list[schemas.DailyChange])
+def read_daily_changes(db: Session = Depends(get_session)):
     """Get daily price changes for all stocks"""
     return crud.get_daily_changes(db)
 
 @router.get("/", response_model=list[schemas.Stock])
-def read_stocks(skip: int = 0, limit: int = 30, db: Session = Depends(get_db)):
+@cached(list[schemas.Stock])
+def read_stocks(skip: int = 0, limit: int = 30, db: Session = Depends(get_session)):
     return crud.get_stocks(db, skip, limit)
 
 @router.get("/{symbol}", response_model=schemas.Stock)
-def read_stock(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.Stock)
+def read_stock(symbol: str, db: Session = Depends(get_session)):
     db_stock = crud.get_stock(db, symbol.upper())
     if not db_stock:
         raise HTTPException(status_code=404, detail="Stock not found")
     return db_stock
 
-@router.get("/{symbol}/ohlc", response_model=list[schemas.OHLC])
-def read_ohlc(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.StockBundle)
+def bundle_json(symbol: str, sections: tuple, db: Session):
+    stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return crud.get_stock_bundle(db, stock, sections)
+
+@router.get("/{symbol}/bundle", response_model=schemas.StockBundle)
+async def read_bundle(
+    request: Request,
+    symbol: str,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_session),
+):
+    """
+    Several per-stock sections in one call. `fields` is a comma-separated
+    subset of crud.BUNDLE_SECTIONS (all sections when omitted).
+    """
+    if fields:
+        # Sorted and de-duplicated, so "a,b", "b,a" and "a,a,b" share a cache entry
+        sections = tuple(sorted({f.strip() for f in fields.split(",") if f.strip()}))
+        unknown = [f for f in sections if f not in crud.BUNDLE_SECTIONS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}",
+            )
+    else:
+        sections = tuple(sorted(crud.BUNDLE_SECTIONS))
+    return await bundle_json(symbol.upper(), sections, db=db, _cache_request=request)
+
+@cached(list[schemas.OHLC])
+def ohlc_json(symbol: str, start, end, after, limit, db: Session):
+    stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return crud.get_ohlc(db, stock.id, start, end, after, limit)
+
+async def ohlc_columns_response(db: Session, request: Request, symbol: str, start, end, after, limit, media_type: str):
+    """Columnar /ohlc body straight from get_ohlc_arrays, cached like ohlc_json."""
+    def load(session):
+        stock = crud.get_stock(session, symbol.upper())
+        if not stock:
+            raise HTTPException(status_code=404, detail="Stock not found")
+        return stock.symbol, crud.get_ohlc_arrays(
+            session, stock.id, start, end, after, limit, null_volume=True
+        )
+
+    def encode(data):
+        stock_symbol, bars = data
+        return encode_columns(bars, media_type, metadata={"symbol": stock_symbol})
+
+    key = ("ohlc_columns", symbol.upper(), start, end, after, limit, media_type)
+    return await cached_response(request, db, key, load, encode, media_type)
+
+@router.get("/{symbol}/ohlc", response_model=list[schemas.OHLC], responses=COLUMNAR_RESPONSES)
+async def read_ohlc(
+    request: Request,
+    symbol: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    after: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_session),
+):
+    """
+    Daily bars oldest first, optionally within [start, end]. Page with
+    `limit` and `after`: pass the last trade_date of a page as `after` to get
+    the next one; a page shorter than `limit` is the last.
+
+    Accept: application/x-columnar+json returns one array per column
+    (null where a value is unknown, as in the JSON body);
+    application/vnd.apache.arrow.stream returns an Arrow IPC stream (when
+    pyarrow is installed).
+    """
+    media_type = negotiate(request)
+    if media_type == JSON:
+        response = await ohlc_json(symbol, start, end, after, limit, db=db, _cache_request=request)
+    else:
+        response = await ohlc_columns_response(db, request, symbol, start, end, after, limit, media_type)
+    response.headers["Vary"] = "Accept"
+    return response
+
+def ohlc_ndjson(stock_id: int, start, end, after, limit):
+    """
+    Bars as NDJSON, one chunk per cursor batch. Runs in its own session:
+    request dependencies may be torn down before the body is consumed.
+    """
+    db = SessionLocal()
+    try:
+        for rows in crud.iter_ohlc(db, stock_id, OHLC_STREAM_BATCH_SIZE, start, end, after, limit):
+            yield "".join(
+                json.dumps({
+                    "trade_date": row.trade_date.isoformat(),
+                    "open": row.open,
+                    "high": row.high,
+                    "low": row.low,
+                    "close": row.close,
+                    "volume": row.volume,
+                }) + "\n"
+                for row in rows
+            )
+    finally:
+        db.close()
+
+@router.get("/{symbol}/ohlc/stream")
+def stream_ohlc(
+    symbol: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    after: Optional[date] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    db: Session = Depends(get_db),
+):
+    """
+    Same bars and parameters as /ohlc, streamed as newline-delimited JSON
+    from a server-side cursor, so memory per request stays constant
+    regardless of the range.
+    """
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
-    return crud.get_ohlc(db, stock.id)
+    return StreamingResponse(
+        ohlc_ndjson(stock.id, start, end, after, limit),
+        media_type="application/x-ndjson",
+    )
 
 @router.get("/{symbol}/dividends", response_model=list[schemas.Dividend])
-def read_dividends(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.Dividend])
+def read_dividends(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_dividends(db, stock.id)
 
 @router.get("/{symbol}/splits", response_model=list[schemas.Split])
-def read_splits(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.Split])
+def read_splits(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_splits(db, stock.id)
 
 @router.get("/{symbol}/info", response_model=schemas.JSONData)
-def read_info(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.JSONData)
+def read_info(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
@@ -70,7 +211,8 @@ def read_info(symbol: str, db: Session = Depends(get_db)):
     return result
 
 @router.get("/{symbol}/fast_info", response_model=schemas.JSONData)
-def read_fast_info(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.JSONData)
+def read_fast_info(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
@@ -80,42 +222,67 @@ def read_fast_info(symbol: str, db: Session = Depends(get_db)):
     return result
 
 @router.get("/{symbol}/income", response_model=list[schemas.Statement])
-def read_income(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.Statement])
+def read_income(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_financials(db, models.IncomeStatement, stock.id)
 
 @router.get("/{symbol}/balance", response_model=list[schemas.Statement])
-def read_balance(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.Statement])
+def read_balance(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_financials(db, models.BalanceSheet, stock.id)
 
 @router.get("/{symbol}/cashflow", response_model=list[schemas.Statement])
-def read_cashflow(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.Statement])
+def read_cashflow(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_financials(db, models.Cashflow, stock.id)
 
 @router.get("/{symbol}/earnings", response_model=list[schemas.EarningsRec])
-def read_earnings(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.EarningsRec])
+def read_earnings(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_earnings(db, stock.id)
 
 @router.get("/{symbol}/earnings_calendar", response_model=list[schemas.EarningsCal])
-def read_calendar(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.EarningsCal])
+def read_calendar(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_calendar(db, stock.id)
 
 @router.get("/{symbol}/filings", response_model=list[schemas.SecFilingSchema])
-def read_filings(symbol: str, db: Session = Depends(get_db)):
+@cached(list[schemas.SecFilingSchema])
+def read_filings(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
     return crud.get_filings(db, stock.id)
 
 @router.get("/{symbol}/sustainability", response_model=schemas.JSONData)
-def read_sustainability(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.JSONData)
+def read_sustainability(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
-    return crud.get_sustainability(db, stock.id)
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    result = crud.get_sustainability(db, stock.id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Sustainability data not found")
+    return result
 
 @router.get("/{symbol}/volatility", response_model=schemas.VolatilityMetrics)
-def read_volatility(symbol: str, db: Session = Depends(get_db)):
+@cached(schemas.VolatilityMetrics)
+def read_volatility(symbol: str, db: Session = Depends(get_session)):
     stock = crud.get_stock(db, symbol.upper())
     if not stock:
         raise HTTPException(status_code=404, detail="Stock not found")
@@ -124,6 +291,26 @@ def read_volatility(symbol: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Volatility metrics not found")
     return metrics
 
+@router.get("/{symbol}/volatility/history", response_model=List[schemas.VolatilityPoint])
+@cached(List[schemas.VolatilityPoint])
+def read_volatility_history(
+    symbol: str,
+    window: int = 60,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_session),
+):
+    """Rolling annualized volatility and beta per trading day"""
+    if window not in VOLATILITY_WINDOWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"window must be one of {', '.join(map(str, VOLATILITY_WINDOWS))}",
+        )
+    stock = crud.get_stock(db, symbol.upper())
+    if not stock:
+        raise HTTPException(status_code=404, detail="Stock not found")
+    return crud.get_volatility_history(db, stock.id, window, start, end)
+
 @router.get("/{symbol}/news", response_model=List[schemas.NewsArticle])
 def get_stock_news(
     symbol: str,
@@ -136,36 +323,20 @@ def get_stock_news(
 
     cached_news = crud.get_news_by_stock(db, stock.id, max_age_days)
     if cached_news:
+        # Rows left unscored (e.g. by a restart) are picked up again here
+        sentiment_worker.submit(a.id for a in cached_news if a.sentiment_label is None)
         return cached_news
 
-    ticker = yf.Ticker(symbol)
-    news_items = ticker.news
-
-    crud.delete_old_news(db, stock.id)
-
-    processed_news = []
-    for article in news_items:
-        try:
-            sentiment = sentiment_analyzer(article['content']['title'])[0]
-            
-            news_data = schemas.NewsArticleCreate(
-                stock_id=stock.id,
-                title=article['content']['title'],
-                publisher=article['content']['provider']['displayName'],
-                link=article['content']['provider']['url'],
-                published_date=datetime.fromisoformat(article['content']['pubDate'].split('T')[0]),
-                summary=article['content']['summary'],
-                sentiment_score=float(sentiment["score"]),
-                sentiment_label=sentiment["label"]
-            )
-            
-            db_news = crud.create_news_article(db, news_data)
-            processed_news.append(db_news)
-        except KeyError as e:
-            print(f"Skipping article due to missing data: {e}")
-            continue
-        except Exception as e:
-            print(f"Error processing article: {e}")
-            continue
-
-    return processed_news
+    stale_news = crud.get_news_by_stock(db, stock.id, max_age_days=None)
+    if not NEWS_FETCH_ON_REQUEST:
+        # jobs/news.py keeps the table fresh; serve whatever is stored
+        return stale_news
+
+    # Stale-while-revalidate: serve expired news now and refresh behind it
+    if stale_news:
+        news_refresher.refresh_in_background(stock.id, stock.symbol)
+        return stale_news
+
+    # Nothing stored yet: wait for the (shared) refresh
+    news_refresher.refresh(stock.id, stock.symbol)
+    return crud.get_news_by_stock(db, stock.id, max_age_days=None)
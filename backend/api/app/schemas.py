@@ -1,6 +1,6 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Token(BaseModel):
@@ -55,7 +55,7 @@ class OHLC(BaseModel):
     high: float
     low: float
     close: float
-    volume: int
+    volume: Optional[int] = None  # NULL when the source reported no volume
     class Config:
         orm_mode = True
 
@@ -111,11 +111,40 @@ class VolatilityMetrics(BaseModel):
     class Config:
         orm_mode = True
 
+class VolatilityPoint(BaseModel):
+    trade_date: date
+    volatility: float | None
+    beta: float | None
+    class Config:
+        orm_mode = True
+
+class StockBundle(BaseModel):
+    stock: Stock
+    ohlc: Optional[List[OHLC]] = None
+    dividends: Optional[List[Dividend]] = None
+    splits: Optional[List[Split]] = None
+    info: Optional[JSONData] = None
+    fast_info: Optional[JSONData] = None
+    income: Optional[List[Statement]] = None
+    balance: Optional[List[Statement]] = None
+    cashflow: Optional[List[Statement]] = None
+    earnings: Optional[List[EarningsRec]] = None
+    earnings_calendar: Optional[List[EarningsCal]] = None
+    filings: Optional[List[SecFilingSchema]] = None
+    volatility: Optional[VolatilityMetrics] = None
+    sustainability: Optional[JSONData] = None
+    class Config:
+        orm_mode = True
+
+
+# Longest lookback_period (calendar days) a pattern request may ask for
+MAX_LOOKBACK_DAYS = 3650
 
 class PatternRequest(BaseModel):
     symbol: str
     pattern_name: str
-    lookback_period: Optional[int] = 100
+    lookback_period: int = Field(100, ge=1, le=MAX_LOOKBACK_DAYS)
+    format: Literal["list", "columnar"] = "list"
 
 class PatternMatch(BaseModel):
     pattern_name: str
@@ -124,6 +153,37 @@ class PatternMatch(BaseModel):
     class Config:
         orm_mode = True
 
+class PatternBatchRequest(BaseModel):
+    symbols: List[str]
+    pattern_names: List[str]
+    lookback_period: int = Field(100, ge=1, le=MAX_LOOKBACK_DAYS)
+
+class SymbolPatternMatches(BaseModel):
+    symbol: str
+    matches: Dict[str, List[PatternMatch]] = {}
+    errors: Dict[str, str] = {}  # pattern_name -> calculation error
+    error: Optional[str] = None  # set when the symbol has no data
+
+class PatternColumns(BaseModel):
+    pattern_name: str
+    dates: List[date]
+    # Output name (value, macd/signal/hist, slowk/slowd, upper/middle/lower) -> series
+    values: Dict[str, List[Optional[float]]]
+
+class IndicatorColumns(BaseModel):
+    symbol: str
+    dates: List[date]
+    # indicator_values column (rsi, macd, bbands_upper, ...) -> series
+    values: Dict[str, List[Optional[float]]]
+
+class PatternSignal(BaseModel):
+    symbol: str
+    pattern_name: str
+    trade_date: date
+    value: int  # TA-Lib output: positive bullish, negative bearish
+    class Config:
+        orm_mode = True
+
 class PatternList(BaseModel):
     patterns: List[str]
     class Config:
@@ -137,8 +197,9 @@ class NewsArticleBase(BaseModel):
     link: str
     published_date: date
     summary: str
-    sentiment_score: float
-    sentiment_label: str
+    # None until the background sentiment worker has scored the title
+    sentiment_score: Optional[float] = None
+    sentiment_label: Optional[str] = None
 
 class NewsArticleCreate(NewsArticleBase):
     stock_id: int
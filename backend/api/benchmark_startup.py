@@ -0,0 +1,56 @@
+"""
+Time how long a fresh interpreter takes to import the API (what every uvicorn
+worker pays before serving its first request), and optionally how long the
+sentiment model then takes to load.
+
+    cd backend/api
+    python benchmark_startup.py --runs 5 --model
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_seconds": elapsed,
+    "nlp_loaded": any(m in sys.modules for m in ("transformers", "torch")),
+}))
+"""
+
+MODEL_SNIPPET = """
+import json, time
+from app.core.sentiment import load_sentiment_pipeline
+started = time.perf_counter()
+load_sentiment_pipeline()
+print(json.dumps({"model_seconds": time.perf_counter() - started}))
+"""
+
+
+def run(snippet):
+    out = subprocess.run(
+        [sys.executable, "-c", snippet], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API startup time.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model", action="store_true",
+                        help="also time loading the sentiment model")
+    args = parser.parse_args()
+
+    results = [run(IMPORT_SNIPPET) for _ in range(args.runs)]
+    times = [r["import_seconds"] for r in results]
+    print(f"import app.main: median {statistics.median(times):.2f}s, "
+          f"min {min(times):.2f}s, max {max(times):.2f}s over {args.runs} runs")
+    print(f"transformers/torch imported at startup: {any(r['nlp_loaded'] for r in results)}")
+
+    if args.model:
+        print(f"sentiment model load: {run(MODEL_SNIPPET)['model_seconds']:.2f}s")
@@ -0,0 +1,64 @@
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+
+# config.py builds its engines at import time, so point them at a scratch
+# SQLite database before the app is imported. ASYNC_DB is taken from the
+# environment (test_async_db.py reruns the route tests with it set).
+_db_dir = tempfile.mkdtemp(prefix="api-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'api.db')}"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app import models  # noqa: E402
+from app.core.cache import get_cache_backend  # noqa: E402
+from app.core.security import get_current_user  # noqa: E402
+from app.main import app  # noqa: E402
+
+SYMBOLS = ("AAPL", "MSFT")
+FIRST_DAY = date(2024, 1, 1)
+DAYS = 30
+# MSFT's bar on this day has no volume, like bars Yahoo reports without one
+NULL_VOLUME_DAY = 5
+
+
+def bar(stock_id, k):
+    close = 100.0 * stock_id + k
+    return models.StockOHLC(
+        stock_id=stock_id,
+        trade_date=FIRST_DAY + timedelta(days=k),
+        open=close - 0.5,
+        high=close + 1.0,
+        low=close - 1.0,
+        close=close,
+        volume=None if (stock_id, k) == (2, NULL_VOLUME_DAY) else 1000 + k,
+    )
+
+
+@pytest.fixture(scope="session")
+def seeded():
+    session = models.SessionLocal()
+    try:
+        for stock_id, symbol in enumerate(SYMBOLS, 1):
+            session.add(models.Stock(id=stock_id, symbol=symbol, name=f"{symbol} Inc."))
+            session.add_all(bar(stock_id, k) for k in range(DAYS))
+        session.commit()
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(seeded):
+    get_cache_backend().clear()
+    app.dependency_overrides[get_current_user] = lambda: None
+    try:
+        # Not entered as a context manager: the startup hooks would start the
+        # sentiment worker
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
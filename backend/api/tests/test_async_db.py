@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.config import ASYNC_DB
+
+TESTS_DIR = os.path.dirname(__file__)
+
+
+@pytest.mark.skipif(ASYNC_DB, reason="this run already uses ASYNC_DB")
+def test_cached_routes_with_async_db():
+    """The engines are configured at import time, so rerun in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+         os.path.join(TESTS_DIR, "test_cache.py")],
+        cwd=os.path.join(TESTS_DIR, ".."),
+        env={**os.environ, "ASYNC_DB": "true"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
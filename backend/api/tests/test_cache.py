@@ -0,0 +1,90 @@
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import cache
+from app.core.config import ASYNC_DB, get_session
+from app.routers import stocks
+
+from conftest import DAYS, FIRST_DAY, SYMBOLS
+
+
+def test_session_flavour_follows_async_db():
+    db = asyncio.run(anext(get_session())) if ASYNC_DB else next(get_session())
+    try:
+        assert isinstance(db, AsyncSession) == ASYNC_DB
+    finally:
+        if ASYNC_DB:
+            asyncio.run(db.close())
+        else:
+            db.close()
+
+
+def test_cached_route_and_conditional_request(client):
+    response = client.get("/stocks/")
+    assert response.status_code == 200
+    assert [s["symbol"] for s in response.json()] == list(SYMBOLS)
+
+    etag = response.headers["etag"]
+    again = client.get("/stocks/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+
+def test_cached_route_not_found(client):
+    assert client.get("/stocks/NOPE").status_code == 404
+    assert client.get("/stocks/NOPE/ohlc").status_code == 404
+
+
+def test_ohlc_json_and_columnar_agree(client):
+    rows = client.get("/stocks/aapl/ohlc", params={"limit": 5}).json()
+    assert [r["trade_date"] for r in rows][0] == FIRST_DAY.isoformat()
+    assert [r["close"] for r in rows] == [100.0, 101.0, 102.0, 103.0, 104.0]
+
+    response = client.get(
+        "/stocks/AAPL/ohlc",
+        headers={"Accept": "application/x-columnar+json"},
+    )
+    assert response.headers["content-type"] == "application/x-columnar+json"
+    assert "Accept" in response.headers["vary"]
+    columns = response.json()
+    assert len(columns["trade_date"]) == DAYS
+    assert columns["close"][:5] == [r["close"] for r in rows]
+    assert columns["volume"][:5] == [r["volume"] for r in rows]
+
+
+def test_bundle_fields_share_a_cache_entry(client):
+    first = client.get("/stocks/AAPL/bundle", params={"fields": "splits,dividends"})
+    second = client.get("/stocks/AAPL/bundle", params={"fields": "dividends, splits,dividends"})
+    assert first.status_code == second.status_code == 200
+    assert first.headers["etag"] == second.headers["etag"]
+    assert client.get("/stocks/AAPL/bundle", params={"fields": "nope"}).status_code == 400
+
+
+def test_encoding_runs_off_the_event_loop(client, monkeypatch):
+    on_loop = []
+    json_body, encode_columns = cache._json_body, stocks.encode_columns
+
+    def in_event_loop():
+        try:
+            asyncio.get_running_loop()
+            return True
+        except RuntimeError:
+            return False
+
+    def record_json_body(*args):
+        on_loop.append(in_event_loop())
+        return json_body(*args)
+
+    def record_encode_columns(*args, **kwargs):
+        on_loop.append(in_event_loop())
+        return encode_columns(*args, **kwargs)
+
+    monkeypatch.setattr(cache, "_json_body", record_json_body)
+    monkeypatch.setattr(stocks, "encode_columns", record_encode_columns)
+    assert client.get("/stocks/MSFT/ohlc").status_code == 200
+    assert client.get(
+        "/stocks/MSFT/ohlc", headers={"Accept": "application/x-columnar+json"}
+    ).status_code == 200
+    assert on_loop == [False, False]
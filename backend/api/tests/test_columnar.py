@@ -0,0 +1,104 @@
+import io
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import columnar
+from app.core.columnar import ARROW_STREAM, COLUMNAR_JSON, JSON, negotiate
+
+from conftest import DAYS, NULL_VOLUME_DAY
+
+
+def request_accepting(accept):
+    headers = [] if accept is None else [(b"accept", accept.encode())]
+    return Request({"type": "http", "headers": headers})
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("*/*", JSON),
+    ("application/*", JSON),
+    ("application/x-columnar+json", COLUMNAR_JSON),
+    ("application/json;q=0.5, application/x-columnar+json", COLUMNAR_JSON),
+    ("application/x-columnar+json;q=0.2, */*;q=0.5", JSON),
+    ("application/vnd.apache.arrow.stream, application/json;q=0.9", ARROW_STREAM),
+])
+def test_negotiate(monkeypatch, accept, expected):
+    monkeypatch.setattr(columnar, "arrow_available", lambda: True)
+    assert negotiate(request_accepting(accept)) == expected
+
+
+def test_negotiate_without_pyarrow(monkeypatch):
+    monkeypatch.setattr(columnar, "arrow_available", lambda: False)
+    assert negotiate(request_accepting(f"{ARROW_STREAM}, {JSON};q=0.1")) == JSON
+    with pytest.raises(HTTPException) as excinfo:
+        negotiate(request_accepting(ARROW_STREAM))
+    assert excinfo.value.status_code == 406
+    assert "pyarrow" in excinfo.value.detail
+
+
+def test_not_acceptable(client, monkeypatch):
+    assert client.get("/stocks/AAPL/ohlc", headers={"Accept": "text/html"}).status_code == 406
+    monkeypatch.setattr(columnar, "arrow_available", lambda: False)
+    assert client.get("/stocks/AAPL/ohlc", headers={"Accept": ARROW_STREAM}).status_code == 406
+
+
+def test_columnar_json_matches_json(client):
+    rows = client.get("/stocks/MSFT/ohlc").json()
+    response = client.get("/stocks/MSFT/ohlc", headers={"Accept": COLUMNAR_JSON})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == COLUMNAR_JSON
+    columns = response.json()
+    assert list(columns) == ["trade_date", "open", "high", "low", "close", "volume"]
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == rows
+    assert rows[NULL_VOLUME_DAY]["volume"] is None
+    assert columns["volume"][NULL_VOLUME_DAY] is None
+
+
+def test_arrow_round_trip(client):
+    pa = pytest.importorskip("pyarrow")
+    rows = client.get("/stocks/MSFT/ohlc").json()
+    response = client.get("/stocks/MSFT/ohlc", headers={"Accept": ARROW_STREAM})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM
+
+    table = pa.ipc.open_stream(io.BytesIO(response.content)).read_all()
+    assert table.schema.metadata == {b"symbol": b"MSFT"}
+    assert table.schema.field("trade_date").type == pa.date32()
+    assert table.schema.field("volume").type == pa.int64()
+    assert table.num_rows == DAYS
+    assert table.column("volume").null_count == 1
+    decoded = [
+        {**row, "trade_date": row["trade_date"].isoformat()}
+        for row in table.to_pylist()
+    ]
+    assert decoded == rows
+
+
+def test_etag_per_media_type(client):
+    etags = {}
+    for media_type in (JSON, COLUMNAR_JSON, ARROW_STREAM):
+        response = client.get("/stocks/AAPL/ohlc", headers={"Accept": media_type})
+        assert response.status_code == 200
+        assert "Accept" in response.headers["vary"]
+        etags[media_type] = response.headers["etag"]
+    assert len(set(etags.values())) == 3
+
+    for media_type, etag in etags.items():
+        same = client.get("/stocks/AAPL/ohlc", headers={"Accept": media_type, "If-None-Match": etag})
+        assert same.status_code == 304
+    other = client.get(
+        "/stocks/AAPL/ohlc",
+        headers={"Accept": COLUMNAR_JSON, "If-None-Match": etags[JSON]},
+    )
+    assert other.status_code == 200
+    assert other.headers["etag"] == etags[COLUMNAR_JSON]
+
+
+def test_nullable_list():
+    masked = np.ma.MaskedArray(np.array([1, 2, 3], dtype=np.int64), mask=[False, True, False])
+    assert columnar.nullable_list(masked) == [1, None, 3]
+    assert columnar.nullable_list(np.array([1.5, np.nan])) == [1.5, None]
+    assert columnar.nullable_list(np.array(["2024-01-02"], dtype="datetime64[D]")) == ["2024-01-02"]
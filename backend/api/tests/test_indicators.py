@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+import talib
+
+from app import indicators
+from app.indicators import (
+    INDICATOR_COLUMNS,
+    StreamingIndicator,
+    load_streams,
+    new_streams,
+    save_streams,
+    update_indicators,
+)
+
+
+def make_bars(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    # A run of flat, unchanged bars exercises the zero-range/zero-change branches
+    open_[200:210] = high[200:210] = low[200:210] = close[200:210] = close[199]
+    return {
+        "trade_date": np.arange(n).astype("datetime64[D]"),
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, n),
+    }
+
+
+def talib_outputs(bars):
+    high, low, close = bars["high"], bars["low"], bars["close"]
+    macd, signal, hist = talib.MACD(close, *indicators.MACD_PERIODS)
+    return {
+        "ema": (talib.EMA(close, timeperiod=indicators.EMA_PERIOD),),
+        "rsi": (talib.RSI(close, timeperiod=indicators.RSI_PERIOD),),
+        "atr": (talib.ATR(high, low, close, timeperiod=indicators.ATR_PERIOD),),
+        "obv": (talib.OBV(close, bars["volume"].astype(np.float64)),),
+        "macd": (macd, signal, hist),
+        "adx": (talib.ADX(high, low, close, timeperiod=indicators.ADX_PERIOD),),
+    }
+
+
+def stream(indicator, bars):
+    rows = [
+        indicator.update(h, l, c, float(v))
+        for h, l, c, v in zip(bars["high"], bars["low"], bars["close"], bars["volume"])
+    ]
+    return [np.array(column) for column in zip(*rows)]
+
+
+@pytest.mark.parametrize("name", sorted(indicators.STREAMING_INDICATORS))
+def test_streaming_port_matches_talib(name):
+    bars = make_bars()
+    expected = talib_outputs(bars)[name]
+    actual = stream(indicators.STREAMING_INDICATORS[name](), bars)
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(want))
+        np.testing.assert_allclose(got, want, rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+@pytest.mark.parametrize("cut", [1, 13, 33, 40, 205, 399])
+def test_resume_from_saved_state(cut):
+    bars = make_bars()
+    full = update_indicators(bars, new_streams())
+
+    streams = new_streams()
+    update_indicators({k: v[:cut] for k, v in bars.items()}, streams)
+    state = json.loads(json.dumps(save_streams(streams)))
+    resumed = update_indicators(bars, load_streams(state), skip=cut)
+
+    for column in INDICATOR_COLUMNS:
+        np.testing.assert_array_equal(resumed[column], full[column][cut:])
+
+
+def test_streaming_indicator_is_abstract():
+    with pytest.raises(TypeError):
+        StreamingIndicator()
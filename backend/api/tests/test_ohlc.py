@@ -0,0 +1,67 @@
+import json
+from datetime import timedelta
+
+import pytest
+
+from app import crud
+from app.routers import stocks
+
+from conftest import DAYS, FIRST_DAY
+
+
+def day(k):
+    return (FIRST_DAY + timedelta(days=k)).isoformat()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 10, DAYS, DAYS + 5])
+def test_keyset_pages_add_up_to_the_unpaged_body(client, limit):
+    everything = client.get("/stocks/AAPL/ohlc").json()
+    assert len(everything) == DAYS
+
+    pages, params = [], {"limit": limit}
+    while True:
+        page = client.get("/stocks/AAPL/ohlc", params=params).json()
+        pages.append(page)
+        if len(page) < limit:
+            break
+        params["after"] = page[-1]["trade_date"]
+    assert [bar for page in pages for bar in page] == everything
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_start_and_end_are_inclusive(client):
+    bars = client.get("/stocks/AAPL/ohlc", params={"start": day(3), "end": day(6)}).json()
+    assert [bar["trade_date"] for bar in bars] == [day(k) for k in range(3, 7)]
+
+    one = client.get("/stocks/AAPL/ohlc", params={"start": day(5), "end": day(5)}).json()
+    assert [bar["trade_date"] for bar in one] == [day(5)]
+
+
+@pytest.mark.parametrize("batch_size", [1000, 4])
+def test_stream_matches_the_json_body(client, monkeypatch, batch_size):
+    monkeypatch.setattr(stocks, "OHLC_STREAM_BATCH_SIZE", batch_size)
+    batches = []
+    iter_ohlc = crud.iter_ohlc
+
+    def record_batches(*args, **kwargs):
+        for rows in iter_ohlc(*args, **kwargs):
+            batches.append(len(rows))
+            yield rows
+
+    monkeypatch.setattr(crud, "iter_ohlc", record_batches)
+    for params in ({}, {"start": day(2), "end": day(20), "after": day(4), "limit": 9}):
+        response = client.get("/stocks/AAPL/ohlc/stream", params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert ndjson(response) == client.get("/stocks/AAPL/ohlc", params=params).json()
+    assert max(batches) <= batch_size
+    assert sum(batches) == DAYS + 9
+
+
+def test_unknown_symbol(client):
+    assert client.get("/stocks/NOPE/ohlc", params={"limit": 5}).status_code == 404
+    assert client.get("/stocks/NOPE/ohlc/stream").status_code == 404
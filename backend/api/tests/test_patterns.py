@@ -0,0 +1,193 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+
+from app import models
+from app.routers import patterns
+from app.schemas import MAX_LOOKBACK_DAYS
+
+from conftest import DAYS
+from test_indicators import make_bars
+
+
+def test_batch_limits(client, monkeypatch):
+    monkeypatch.setattr(patterns, "PATTERN_BATCH_MAX_SYMBOLS", 2)
+    monkeypatch.setattr(patterns, "PATTERN_BATCH_MAX_PATTERNS", 1)
+
+    def analyze(symbols, pattern_names):
+        return client.post("/patterns/analyze/batch", json={
+            "symbols": symbols,
+            "pattern_names": pattern_names,
+            "lookback_period": MAX_LOOKBACK_DAYS,
+        })
+
+    response = analyze(["AAPL", "MSFT"], ["cdl_doji"])
+    assert response.status_code == 200
+    assert [r["symbol"] for r in response.json()] == ["AAPL", "MSFT"]
+
+    response = analyze(["AAPL", "MSFT", "NOPE"], ["cdl_doji"])
+    assert response.status_code == 413
+    assert "symbols" in response.json()["detail"]
+    assert analyze(["AAPL"], ["cdl_doji", "rsi"]).status_code == 413
+
+
+@pytest.mark.parametrize("lookback_period", [None, 0, -5, MAX_LOOKBACK_DAYS + 1, "soon"])
+def test_invalid_lookback_period_is_rejected(client, lookback_period):
+    single = client.post("/patterns/analyze", json={
+        "symbol": "AAPL",
+        "pattern_name": "cdl_doji",
+        "lookback_period": lookback_period,
+    })
+    batch = client.post("/patterns/analyze/batch", json={
+        "symbols": ["AAPL"],
+        "pattern_names": ["cdl_doji"],
+        "lookback_period": lookback_period,
+    })
+    assert single.status_code == 422
+    assert batch.status_code == 422
+
+
+def per_bar_matches(pattern_name, bars, result):
+    """The per-bar loop /patterns/analyze used before pattern_matches was vectorized."""
+    matches = []
+    for idx, value in enumerate(result):
+        if pd.notna(value) and value != 0:
+            matches.append({
+                "pattern_name": pattern_name,
+                "timestamp": bars["trade_date"][idx].item(),
+                "signal_value": float(value),
+            })
+    return matches
+
+
+def falling_then_random_bars():
+    bars = make_bars()
+    # Closes only fall over the first 30 bars, so RSI is exactly 0 once warmed up
+    falling = 200 - np.arange(30.0)
+    bars["close"][:30] = falling
+    bars["open"][:30] = falling + 0.5
+    bars["high"][:30] = falling + 1
+    bars["low"][:30] = falling - 1
+    return bars
+
+
+@pytest.mark.parametrize("pattern_name", ["cdl_doji", "cdl_engulfing", "rsi"])
+def test_matches_equal_the_per_bar_loop(pattern_name):
+    bars = falling_then_random_bars()
+    result = patterns.compute_pattern(pattern_name, bars, 14)
+    expected = per_bar_matches(pattern_name, bars, result)
+    assert patterns.pattern_matches(pattern_name, bars, result) == expected
+    assert expected
+    if pattern_name == "rsi":
+        # Both the NaN warm-up and the zero readings were dropped
+        assert np.isnan(result[:14]).all()
+        assert (result[14:30] == 0).all()
+
+
+def test_adx_uses_high_low_close(client):
+    bars = make_bars()
+    outputs = patterns.compute_outputs("adx", bars, 14)
+    np.testing.assert_array_equal(
+        outputs["value"], talib.ADX(bars["high"], bars["low"], bars["close"], timeperiod=14)
+    )
+    response = client.post("/patterns/analyze", json={
+        "symbol": "AAPL", "pattern_name": "adx", "lookback_period": MAX_LOOKBACK_DAYS,
+    })
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("pattern_name, lookback_period, expected", [
+    ("macd", 14, talib.MACD),
+    ("stochastic", 14, talib.STOCH),
+    ("bollinger_bands", 20, talib.BBANDS),
+])
+def test_columnar_returns_every_output(pattern_name, lookback_period, expected):
+    bars = make_bars()
+    outputs = patterns.compute_outputs(pattern_name, bars, lookback_period)
+    body = patterns.pattern_columns(pattern_name, bars, outputs)
+    if pattern_name == "macd":
+        series = expected(bars["close"], fastperiod=12, slowperiod=26, signalperiod=9)
+    elif pattern_name == "stochastic":
+        series = expected(bars["high"], bars["low"], bars["close"], fastk_period=lookback_period)
+    else:
+        series = expected(bars["close"], timeperiod=lookback_period)
+
+    assert body["dates"] == np.datetime_as_string(bars["trade_date"], unit="D").tolist()
+    assert len(body["values"]) == len(series)
+    for values, want in zip(body["values"].values(), series):
+        assert len(values) == len(body["dates"])
+        assert values[0] is None  # warm-up
+        assert values[-1] is not None
+        assert values == [None if np.isnan(v) else v for v in want.tolist()]
+
+
+def test_columnar_format_over_http(client):
+    response = client.post("/patterns/analyze", json={
+        "symbol": "AAPL",
+        "pattern_name": "bollinger_bands",
+        "lookback_period": MAX_LOOKBACK_DAYS,
+        "format": "columnar",
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["pattern_name"] == "bollinger_bands"
+    assert set(body["values"]) == {"upper", "middle", "lower"}
+    assert all(len(v) == len(body["dates"]) == DAYS for v in body["values"].values())
+
+
+@pytest.fixture(scope="module")
+def signals(seeded):
+    today = date.today()
+    rows = [
+        (1, today - timedelta(days=1), "cdl_doji", 100),
+        (1, today - timedelta(days=2), "cdl_engulfing", -100),
+        (2, today - timedelta(days=3), "cdl_doji", 100),
+        (2, today - timedelta(days=10), "cdl_hammer", 100),
+    ]
+    session = models.SessionLocal()
+    try:
+        session.add_all(
+            models.PatternSignal(stock_id=s, trade_date=d, pattern=p, value=v)
+            for s, d, p, v in rows
+        )
+        session.commit()
+    finally:
+        session.close()
+    return rows
+
+
+def scan(client, **params):
+    response = client.get("/patterns/scan", params=params)
+    assert response.status_code == 200
+    return [(r["symbol"], r["pattern_name"], r["value"]) for r in response.json()]
+
+
+def test_scan(client, signals):
+    # Default window is the last 5 days, newest first
+    assert scan(client) == [
+        ("AAPL", "cdl_doji", 100),
+        ("AAPL", "cdl_engulfing", -100),
+        ("MSFT", "cdl_doji", 100),
+    ]
+    assert scan(client, patterns="cdl_doji") == [("AAPL", "cdl_doji", 100), ("MSFT", "cdl_doji", 100)]
+    assert scan(client, patterns="cdl_hammer") == []
+    assert scan(client, patterns="cdl_hammer, cdl_doji,cdl_hammer", days=10) == [
+        ("AAPL", "cdl_doji", 100),
+        ("MSFT", "cdl_doji", 100),
+        ("MSFT", "cdl_hammer", 100),
+    ]
+    # `since` is inclusive and takes precedence over `days`
+    since = (date.today() - timedelta(days=2)).isoformat()
+    assert scan(client, since=since, days=30) == [
+        ("AAPL", "cdl_doji", 100),
+        ("AAPL", "cdl_engulfing", -100),
+    ]
+
+
+def test_scan_unknown_pattern(client, signals):
+    response = client.get("/patterns/scan", params={"patterns": "cdl_doji,rsi"})
+    assert response.status_code == 400
+    assert "rsi" in response.json()["detail"]
@@ -0,0 +1,157 @@
+import threading
+import time
+import uuid
+from datetime import date
+
+import pytest
+
+from app import models
+from app.core.sentiment import SentimentWorker
+
+
+class StubClassifier:
+    """Called like a pipeline; the label names the text it was computed for."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, texts, **kwargs):
+        with self.lock:
+            self.calls.append(list(texts))
+        return [{"label": f"label:{text}", "score": len(text) / 100} for text in texts]
+
+
+@pytest.fixture
+def classifier():
+    return StubClassifier()
+
+
+@pytest.fixture
+def add_articles(seeded):
+    def add(titles):
+        session = models.SessionLocal()
+        try:
+            articles = [
+                models.NewsArticle(
+                    stock_id=1,
+                    title=title,
+                    publisher="Wire",
+                    link=f"https://example.com/{uuid.uuid4()}",
+                    published_date=date(2024, 1, 1),
+                    summary="",
+                    cached_at=date(2024, 1, 1),
+                )
+                for title in titles
+            ]
+            session.add_all(articles)
+            session.commit()
+            return [a.id for a in articles]
+        finally:
+            session.close()
+    return add
+
+
+def unique_titles(n):
+    tag = uuid.uuid4().hex[:8]
+    return [f"Headline {tag} {i}" for i in range(n)]
+
+
+def scored(article_ids):
+    session = models.SessionLocal()
+    try:
+        rows = session.query(models.NewsArticle).filter(models.NewsArticle.id.in_(article_ids)).all()
+        return {a.id: (a.title, a.sentiment_label, a.sentiment_score) for a in rows}
+    finally:
+        session.close()
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.01)
+
+
+def all_scored(article_ids):
+    return lambda: all(label is not None for _, label, _ in scored(article_ids).values())
+
+
+def test_full_batches_do_not_wait(classifier, add_articles):
+    titles = unique_titles(6)
+    ids = add_articles(titles)
+    worker = SentimentWorker(classifier, batch_size=3, max_wait=30)
+    worker.submit(ids)
+    started = time.monotonic()
+    worker.start()
+    try:
+        wait_until(all_scored(ids))
+    finally:
+        worker.stop()
+    assert time.monotonic() - started < 5
+    assert classifier.calls == [titles[:3], titles[3:]]
+
+
+def test_partial_batch_waits_at_most_max_wait(classifier, add_articles):
+    titles = unique_titles(3)
+    ids = add_articles(titles)
+    worker = SentimentWorker(classifier, batch_size=100, max_wait=0.3)
+    worker.start()
+    try:
+        worker.submit(ids[:1])
+        time.sleep(0.05)
+        worker.submit(ids[1:2])  # joins the batch opened by the first id
+        wait_until(all_scored(ids[:2]))
+        worker.submit(ids[2:])
+        wait_until(all_scored(ids))
+    finally:
+        worker.stop()
+    assert classifier.calls == [titles[:2], titles[2:]]
+
+
+def test_results_land_on_their_articles(classifier, add_articles):
+    titles = unique_titles(5)
+    ids = add_articles(titles)
+    worker = SentimentWorker(classifier, batch_size=2, max_wait=0.05)
+    worker.submit(reversed(ids))
+    worker.start()
+    try:
+        wait_until(all_scored(ids))
+    finally:
+        worker.stop()
+    for title, label, score in scored(ids).values():
+        assert label == f"label:{title}"
+        assert float(score) == pytest.approx(len(title) / 100)
+
+
+def test_repeated_titles_hit_the_sentiment_cache(classifier, add_articles):
+    title = unique_titles(1)[0]
+    worker = SentimentWorker(classifier)
+
+    first = add_articles([title, title, f"  {title}  "])
+    assert worker.score(first) == 3
+    assert classifier.calls == [[title]]
+
+    later = add_articles([title])
+    assert worker.score(later) == 1
+    assert classifier.calls == [[title]]
+    assert {label for _, label, _ in scored(first + later).values()} == {f"label:{title}"}
+
+    # Already scored articles are skipped altogether
+    assert worker.score(first) == 0
+
+
+def test_stop_ends_the_worker_thread(classifier, add_articles):
+    ids = add_articles(unique_titles(1))
+    worker = SentimentWorker(classifier, max_wait=0.05)
+    worker.start()
+    thread = worker._thread
+    worker.submit(ids)
+    wait_until(all_scored(ids))
+    assert worker.status()["running"]
+
+    worker.stop()
+    assert not thread.is_alive()
+    assert not worker.status()["running"]
+    assert worker._pending == set()
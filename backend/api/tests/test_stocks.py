@@ -0,0 +1,27 @@
+import pytest
+
+SECTIONS = [
+    "dividends", "splits", "info", "fast_info", "income", "balance", "cashflow",
+    "earnings", "earnings_calendar", "filings", "sustainability", "volatility",
+    "volatility/history", "ohlc", "bundle",
+]
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_unknown_symbol_is_404(client, section):
+    response = client.get(f"/stocks/NOPE/{section}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Stock not found"}
+
+
+@pytest.mark.parametrize("section", ["income", "balance", "cashflow", "earnings", "earnings_calendar", "filings"])
+def test_known_symbol_without_data_is_empty(client, section):
+    response = client.get(f"/stocks/AAPL/{section}")
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_missing_sustainability_is_404(client):
+    response = client.get("/stocks/AAPL/sustainability")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Sustainability data not found"}
@@ -0,0 +1,87 @@
+import io
+import pandas as pd
+from sqlalchemy import Integer, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# SQLite caps the number of bound parameters per statement (999 on older builds)
+SQLITE_MAX_PARAMS = 999
+
+
+def bulk_upsert(session, table, frame):
+    """
+    Upsert every row of `frame` into `table` with a single merge statement.
+    frame columns must be named after table columns and include the primary key.
+    On PostgreSQL the rows are streamed into a temp table with COPY and merged
+    with INSERT ... ON CONFLICT; other dialects fall back to multi-row
+    INSERT ... ON CONFLICT statements.
+    Does not commit.
+    """
+    if frame is None or frame.empty:
+        return 0
+
+    key_cols = [c.name for c in table.primary_key.columns]
+    frame = frame.drop_duplicates(subset=key_cols, keep="last")
+    # Integer columns holding NaN arrive as float64; COPY would reject "123.0"
+    for col in frame.columns:
+        if isinstance(table.columns[col].type, Integer):
+            frame[col] = frame[col].round().astype("Int64")
+
+    if session.bind.dialect.name == "postgresql":
+        _copy_upsert(session, table, frame, key_cols)
+    else:
+        _insert_upsert(session, table, frame, key_cols)
+    return len(frame)
+
+
+def _copy_upsert(session, table, frame, key_cols):
+    cols = list(frame.columns)
+    col_list = ", ".join(cols)
+    tmp = f"tmp_{table.name}"
+    update_cols = [c for c in cols if c not in key_cols]
+    if update_cols:
+        conflict = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in update_cols)
+    else:
+        conflict = "DO NOTHING"
+
+    buf = io.StringIO()
+    frame.to_csv(buf, index=False, header=False)
+    buf.seek(0)
+
+    conn = session.connection()
+    conn.execute(text(
+        f"CREATE TEMP TABLE {tmp} (LIKE {table.name} INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    cursor = conn.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tmp} ({col_list}) FROM STDIN WITH (FORMAT csv)", buf)
+    finally:
+        cursor.close()
+    conn.execute(text(
+        f"INSERT INTO {table.name} ({col_list}) "
+        f"SELECT {col_list} FROM {tmp} "
+        f"ON CONFLICT ({', '.join(key_cols)}) {conflict}"
+    ))
+    conn.execute(text(f"DROP TABLE {tmp}"))
+
+
+def _insert_upsert(session, table, frame, key_cols):
+    rows = [
+        {k: _none_if_nan(v) for k, v in row.items()}
+        for row in frame.to_dict(orient="records")
+    ]
+    update_cols = [c for c in frame.columns if c not in key_cols]
+    chunk = max(1, SQLITE_MAX_PARAMS // len(frame.columns))
+    for start in range(0, len(rows), chunk):
+        stmt = sqlite_insert(table).values(rows[start:start + chunk])
+        if update_cols:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=key_cols,
+                set_={c: stmt.excluded[c] for c in update_cols},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=key_cols)
+        session.execute(stmt)
+
+
+def _none_if_nan(value):
+    return None if pd.isna(value) else value
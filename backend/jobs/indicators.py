@@ -0,0 +1,169 @@
+import os
+import sys
+import argparse
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from config import engine
+from bulk import bulk_upsert
+from models import (
+    Stock,
+    StockOHLC,
+    IndicatorValues,
+    IndicatorState,
+    PatternSignal,
+    bump_data_version,
+)
+
+# Indicator and pattern definitions are shared with the API's /patterns routes
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+from app.indicators import (
+    INDICATOR_COLUMNS,
+    WINDOW_TAIL,
+    candlestick_signals,
+    load_streams,
+    new_streams,
+    save_streams,
+    update_indicators,
+)
+
+Session = sessionmaker(bind=engine)
+
+
+def bars_query(session, stock_id):
+    return session.query(
+        StockOHLC.trade_date,
+        StockOHLC.open,
+        StockOHLC.high,
+        StockOHLC.low,
+        StockOHLC.close,
+        func.coalesce(StockOHLC.volume, 0),
+    ).filter(StockOHLC.stock_id == stock_id)
+
+
+def to_bars(rows):
+    """OHLC rows (as selected by bars_query, oldest first) → update_indicators columns"""
+    columns = list(zip(*rows)) or [()] * 6
+    return {
+        "trade_date": list(columns[0]),
+        "open": np.array(columns[1], dtype=np.float64),
+        "high": np.array(columns[2], dtype=np.float64),
+        "low": np.array(columns[3], dtype=np.float64),
+        "close": np.array(columns[4], dtype=np.float64),
+        "volume": np.array(columns[5], dtype=np.int64),
+    }
+
+
+def load_incremental_bars(session, stock_id, state):
+    """
+    The WINDOW_TAIL bars up to the state's last_date followed by every newer
+    bar, and the number of context bars. None when the stored bar at last_date
+    is gone or its close changed, i.e. the saved state no longer describes the
+    stored history.
+    """
+    tail = (
+        bars_query(session, stock_id)
+        .filter(StockOHLC.trade_date <= state.last_date)
+        .order_by(StockOHLC.trade_date.desc())
+        .limit(WINDOW_TAIL)
+        .all()
+    )
+    if not tail or tail[0][0] != state.last_date or float(tail[0][4]) != state.last_close:
+        return None
+    new = (
+        bars_query(session, stock_id)
+        .filter(StockOHLC.trade_date > state.last_date)
+        .order_by(StockOHLC.trade_date)
+        .all()
+    )
+    return to_bars(tail[::-1] + new), len(tail)
+
+
+def update_stock_indicators(session, stock_id, full=False):
+    """
+    Extend indicator_values and pattern_signals for one stock with the bars
+    after its saved state (all bars when there is none, it is stale, or
+    `full`). Streaming indicators continue from the saved state, so only new
+    bars are fed through them. Returns the number of bars processed.
+    Does not commit.
+    """
+    state = None if full else session.get(IndicatorState, stock_id)
+    loaded = load_incremental_bars(session, stock_id, state) if state is not None else None
+    if loaded is not None:
+        bars, skip = loaded
+        streams = load_streams(state.state)
+    else:
+        session.query(IndicatorValues).filter(IndicatorValues.stock_id == stock_id).delete()
+        session.query(PatternSignal).filter(PatternSignal.stock_id == stock_id).delete()
+        bars = to_bars(bars_query(session, stock_id).order_by(StockOHLC.trade_date).all())
+        skip = 0
+        streams = new_streams()
+
+    dates = bars["trade_date"][skip:]
+    if not dates:
+        return 0
+    values = update_indicators(bars, streams, skip=skip)
+
+    frame = pd.DataFrame({"stock_id": stock_id, "trade_date": dates})
+    for column in INDICATOR_COLUMNS:
+        frame[column] = values[column]
+    bulk_upsert(session, IndicatorValues.__table__, frame)
+
+    hits = candlestick_signals(bars, skip=skip)
+    bulk_upsert(session, PatternSignal.__table__, pd.DataFrame(
+        [(stock_id, dates[i], pattern, value) for i, pattern, value in hits],
+        columns=["stock_id", "trade_date", "pattern", "value"],
+    ))
+    session.merge(IndicatorState(
+        stock_id=stock_id,
+        last_date=dates[-1],
+        last_close=float(bars["close"][-1]),
+        state=save_streams(streams),
+    ))
+    return len(frame)
+
+
+def run_indicator_stage(full=False):
+    """
+    Bring indicator_values and pattern_signals up to date for every stock
+    after an ingest, one stock per transaction. Returns {symbol: error} for
+    failed stocks.
+    """
+    session = Session()
+    errors = {}
+    written = 0
+    try:
+        stocks = session.query(Stock.id, Stock.symbol).order_by(Stock.symbol).all()
+        for stock in stocks:
+            try:
+                written += update_stock_indicators(session, stock.id, full=full)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                errors[stock.symbol] = str(e)
+                print(f"[{stock.symbol}] Error updating indicators:", e)
+        print(
+            f"Stored indicators and candlestick signals for {written} bars of "
+            f"{len(stocks) - len(errors)}/{len(stocks)} symbols"
+        )
+    finally:
+        session.close()
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update stored technical indicators and candlestick signals")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="recompute every stock from its full OHLC history",
+    )
+    args = parser.parse_args()
+
+    run_indicator_stage(full=args.full)
+    session = Session()
+    try:
+        bump_data_version(session)
+    finally:
+        session.close()
@@ -1,10 +1,23 @@
 import os
 import json
+import argparse
 from datetime import datetime
-import yfinance as yf
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import sessionmaker
-from config import engine
+from sqlalchemy import func
+from config import (
+    engine,
+    HISTORY_PERIOD,
+    INCREMENTAL,
+    INGEST_WORKERS,
+    PRICE_BATCH_SIZE,
+    YF_RATE_LIMIT,
+)
+from bulk import bulk_upsert
+from sources import YFinanceSource, FixtureSource
 from models import (
+    bump_data_version,
     create_all_tables,
     Stock,
     StockOHLC,
@@ -96,49 +109,136 @@ def get_or_create_stock(session, symbol):
 
 def upsert_dataframe(session, stock_id, df, Model, date_field, **col_map):
     """
-    Generic upsert: df.index (dates) + columns → Model instance
+    Bulk upsert: df.index (dates) + columns → Model table
     date_field = attribute name on Model for the date key
     col_map = mapping from df.columns to Model field names
+    All rows are merged in one statement (COPY + ON CONFLICT on PostgreSQL).
     """
-    for idx, row in df.iterrows():
-        if hasattr(idx, "date"):
-            date_value = idx.date()  
-        else:
-            date_value = idx
+    if df is None or df.empty:
+        return
+
+    index = df.index
+    if isinstance(index, pd.DatetimeIndex):
+        dates = index.date
+    else:
+        dates = [idx.date() if hasattr(idx, "date") else idx for idx in index]
+
+    frame = pd.DataFrame({"stock_id": stock_id, date_field: dates})
+    for df_col, model_col in col_map.items():
+        frame[model_col] = df[df_col].to_numpy()
 
-        data = {"stock_id": stock_id, date_field: date_value}
-        for df_col, model_col in col_map.items():
-            data[model_col] = row[df_col]
-        obj = Model(**data)
-        session.merge(obj)
+    bulk_upsert(session, Model.__table__, frame)
     session.commit()
 
 
-def fetch_and_load(symbol):
+def _incremental_start(last_date, split_pending):
+    if last_date is None or split_pending:
+        return None
+    return last_date
+
+
+def get_incremental_start(session, stock_id):
+    """
+    First trade date to request for an incremental OHLC refresh, or None when a
+    full backfill is needed: the symbol has no stored bars yet, or a split was
+    recorded that the stored bars have not been reloaded for (whatever its
+    date relative to the last bar, the bars before it are not adjusted).
+    The last stored bar is re-requested so a partial intraday bar is overwritten.
+    """
+    last_date = (
+        session.query(func.max(StockOHLC.trade_date))
+        .filter(StockOHLC.stock_id == stock_id)
+        .scalar()
+    )
+    split_pending = session.query(
+        session.query(StockSplit)
+        .filter(StockSplit.stock_id == stock_id, StockSplit.prices_adjusted.is_(False))
+        .exists()
+    ).scalar()
+    return _incremental_start(last_date, split_pending)
+
+
+def get_incremental_starts(session, symbols):
+    """get_incremental_start for many symbols at once: {symbol: start or None}."""
+    stock_ids = dict(
+        session.query(Stock.symbol, Stock.id).filter(Stock.symbol.in_(symbols)).all()
+    )
+    last_dates = dict(
+        session.query(StockOHLC.stock_id, func.max(StockOHLC.trade_date))
+        .group_by(StockOHLC.stock_id)
+        .all()
+    )
+    pending_splits = {
+        stock_id
+        for (stock_id,) in session.query(StockSplit.stock_id)
+        .filter(StockSplit.prices_adjusted.is_(False))
+        .distinct()
+    }
+    return {
+        sym: _incremental_start(
+            last_dates.get(stock_ids.get(sym)), stock_ids.get(sym) in pending_splits
+        )
+        for sym in symbols
+    }
+
+
+def fetch_prices(source, symbols, incremental=INCREMENTAL, chunk_size=PRICE_BATCH_SIZE):
+    """
+    Batched OHLC stage: symbols are grouped by the window they are missing and
+    each group is downloaded `chunk_size` symbols per multi-ticker request.
+    Returns {symbol: (start, frame)}, start being None for full backfills.
+    Symbols missing from the result fall back to a per-ticker fetch.
+    """
     session = Session()
-    stock = get_or_create_stock(session, symbol)
-    ticker = yf.Ticker(symbol)
+    try:
+        if incremental:
+            starts = get_incremental_starts(session, symbols)
+        else:
+            starts = dict.fromkeys(symbols)
+    finally:
+        session.close()
+
+    groups = {}
+    for sym in symbols:
+        groups.setdefault(starts[sym], []).append(sym)
+
+    prices = {}
+    for start, group in groups.items():
+        window = f"full {HISTORY_PERIOD} backfill" if start is None else f"since {start}"
+        for i in range(0, len(group), chunk_size):
+            chunk = group[i:i + chunk_size]
+            print(f"Downloading OHLC for {len(chunk)} symbols ({window})…")
+            try:
+                frames = source.download(chunk, start=start, period=HISTORY_PERIOD)
+            except Exception as e:
+                print("Batched OHLC download error:", e)
+                continue
+            for sym, frame in frames.items():
+                prices[sym] = (start, frame)
+    return prices
 
+
+def fetch_and_load(symbol, incremental=INCREMENTAL, source=None, prices=None):
+    """
+    Fetch every section for `symbol` from `source` (live Yahoo Finance by
+    default) and load it using a Session owned by this call.
+    prices = (start, frame) prefetched by fetch_prices, if any.
+    Returns {section: error message} for the sections that failed.
+    """
+    source = source or YFinanceSource(YF_RATE_LIMIT)
+    session = Session()
     try:
-        print(f"[{symbol}] 1) Fetching OHLC…")
-        hist = ticker.history(period="3y", auto_adjust=False)
-        upsert_dataframe(
-            session,
-            stock.id,
-            hist,
-            StockOHLC,
-            "trade_date",
-            Open="open",
-            High="high",
-            Low="low",
-            Close="close",
-            Volume="volume",
-        )
-    except Exception as e:
-        print(f"[{symbol}] OHLC fetch error:", e)
+        return load_symbol(session, symbol, source.ticker(symbol), incremental, prices)
+    finally:
+        session.close()
+
+
+def load_symbol(session, symbol, ticker, incremental, prices=None):
+    errors = {}
+    stock = get_or_create_stock(session, symbol)
 
     try:
-        print(f"[{symbol}] 2) Fetching Dividends and Splits…")
+        print(f"[{symbol}] 1) Fetching Dividends and Splits…")
         divs = ticker.dividends
         upsert_dataframe(
             session,
@@ -158,7 +258,45 @@ def fetch_and_load(symbol):
             ratio="ratio",
         )
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Dividends/Splits error:", e)
+        errors["Dividends/Splits"] = str(e)
+
+    try:
+        start = get_incremental_start(session, stock.id) if incremental else None
+        if prices is not None and prices[0] == start:
+            # A split loaded in step 1 changes start, invalidating the batched window
+            print(f"[{symbol}] 2) Loading batched OHLC…")
+            hist = prices[1]
+        elif start is None:
+            print(f"[{symbol}] 2) Fetching OHLC (full {HISTORY_PERIOD} backfill)…")
+            hist = ticker.history(period=HISTORY_PERIOD, auto_adjust=False)
+        else:
+            print(f"[{symbol}] 2) Fetching OHLC since {start}…")
+            hist = ticker.history(start=start, auto_adjust=False)
+        if start is None and incremental and not hist.empty:
+            # Drop stale bars (e.g. pre-split prices) so the reload replaces them;
+            # committed together with the reload below
+            session.query(StockOHLC).filter(StockOHLC.stock_id == stock.id).delete()
+            session.query(StockSplit).filter(StockSplit.stock_id == stock.id).update(
+                {StockSplit.prices_adjusted: True}, synchronize_session=False
+            )
+        upsert_dataframe(
+            session,
+            stock.id,
+            hist,
+            StockOHLC,
+            "trade_date",
+            Open="open",
+            High="high",
+            Low="low",
+            Close="close",
+            Volume="volume",
+        )
+    except Exception as e:
+        session.rollback()
+        print(f"[{symbol}] OHLC fetch error:", e)
+        errors["OHLC"] = str(e)
 
     try:
         print(f"[{symbol}] 3) Fetching Info and Fast Info…")
@@ -172,7 +310,9 @@ def fetch_and_load(symbol):
         session.merge(StockFastInfo(stock_id=stock.id, data=fast_info_dict))
         session.commit()
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Info/FastInfo error:", e)
+        errors["Info/FastInfo"] = str(e)
 
     try:
         print(f"[{symbol}] 4) Fetching Financials…")
@@ -189,7 +329,9 @@ def fetch_and_load(symbol):
                     session.merge(rec)
                 session.commit()
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Financials error:", e)
+        errors["Financials"] = str(e)
 
     try:
         print(f"[{symbol}] 5) Fetching Earnings and Filings…")
@@ -224,7 +366,9 @@ def fetch_and_load(symbol):
                 session.merge(obj)
             session.commit()
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Earnings/Filings error:", e)
+        errors["Earnings/Filings"] = str(e)
 
     try:
         print(f"[{symbol}] 6) Fetching ESG data…")
@@ -236,7 +380,9 @@ def fetch_and_load(symbol):
         session.merge(SustainabilityMetric(stock_id=stock.id, data=data))
         session.commit()
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Sustainability error:", e)
+        errors["Sustainability"] = str(e)
 
     try:
         print(f"[{symbol}] 7) Fetching Holders and Insider Transactions…")
@@ -266,21 +412,84 @@ def fetch_and_load(symbol):
         
         
     except Exception as e:
+        session.rollback()
         print(f"[{symbol}] Holders/Insiders error:", e)
+        errors["Holders/Insiders"] = str(e)
 
-    session.close()
+    return errors
+
+
+def run_ingest(symbols, source, incremental=INCREMENTAL, max_workers=INGEST_WORKERS):
+    """
+    Download OHLC for all `symbols` in batches, then load every symbol
+    concurrently on a bounded thread pool; each worker owns its own Session.
+    Prints a per-symbol report and returns {symbol: errors}.
+    """
+    prices = fetch_prices(source, symbols, incremental)
 
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_and_load, sym, incremental, source, prices.get(sym)): sym
+            for sym in symbols
+        }
+        for future in as_completed(futures):
+            sym = futures[future]
+            try:
+                results[sym] = future.result()
+            except Exception as e:
+                results[sym] = {"load": str(e)}
 
+    print("Ingest summary:")
+    for sym in symbols:
+        errors = results[sym]
+        if errors:
+            print(f"  {sym}: FAILED ({'; '.join(f'{k}: {v}' for k, v in errors.items())})")
+        else:
+            print(f"  {sym}: ok")
+    failed = sum(1 for sym in symbols if results[sym])
+    print(f"{len(symbols) - failed}/{len(symbols)} symbols loaded cleanly")
+    return results
+
+
+from indicators import run_indicator_stage
 from volatility import run_volatility_analysis
 
 if __name__ == "__main__":
-    
+    parser = argparse.ArgumentParser(description="Fetch and load market data")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help=f"re-fetch {HISTORY_PERIOD} of OHLC history for every symbol",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INGEST_WORKERS,
+        help="number of symbols loaded concurrently",
+    )
+    parser.add_argument(
+        "--fixtures",
+        help="load from recorded fixtures in this directory instead of Yahoo Finance",
+    )
+    args = parser.parse_args()
+
     create_all_tables()
 
-    
-    for sym in SYMBOLS:
-        print(f"Fetching & loading data for {sym}…")
-        fetch_and_load(sym)
+    source = FixtureSource(args.fixtures) if args.fixtures else YFinanceSource(YF_RATE_LIMIT)
+    run_ingest(
+        SYMBOLS,
+        source,
+        incremental=INCREMENTAL and not args.full,
+        max_workers=args.workers,
+    )
+    print("Updating technical indicators and candlestick signals...")
+    run_indicator_stage(full=args.full)
+    session = Session()
+    try:
+        bump_data_version(session)
+    finally:
+        session.close()
     
     
     print("Running volatility analysis...")
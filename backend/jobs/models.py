@@ -1,7 +1,8 @@
+from datetime import datetime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import (
     Column, Integer, String, Date, Numeric, BigInteger, Text,
-    JSON, ForeignKey, UniqueConstraint
+    JSON, ForeignKey, Index, UniqueConstraint, Float, Boolean, DateTime, update, false
 )
 from sqlalchemy.orm import relationship
 from config import engine
@@ -32,6 +33,7 @@ class Stock(Base):
     mutualfund_holders   = relationship("MutualFundHolder", back_populates="stock")
     insider_transactions = relationship("InsiderTransaction", back_populates="stock")
     volatility_metrics = relationship("VolatilityMetrics", back_populates="stock")
+    volatility_timeseries = relationship("VolatilityTimeseries", back_populates="stock")
 
 class StockOHLC(Base):
     __tablename__ = "stock_ohlc"
@@ -56,6 +58,8 @@ class StockSplit(Base):
     stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
     split_date = Column(Date, primary_key=True)
     ratio      = Column(Numeric)
+    # Set once the stored OHLC has been reloaded (split-adjusted) after this split was recorded
+    prices_adjusted = Column(Boolean, nullable=False, server_default=false())
     stock      = relationship("Stock", back_populates="splits")
 
 class StockInfo(Base):
@@ -169,6 +173,81 @@ class VolatilityMetrics(Base):
     r_squared = Column(Numeric)  # R-squared of beta calculation
     stock = relationship("Stock", back_populates="volatility_metrics")
 
+class VolatilityTimeseries(Base):
+    __tablename__ = "volatility_timeseries"
+    stock_id    = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    window_days = Column(Integer, primary_key=True)  # 20, 60 or 252 trading days
+    trade_date  = Column(Date, primary_key=True)
+    volatility  = Column(Float)  # Annualized, NULL until the window is full
+    beta        = Column(Float)
+    # Running sums over the window (x = stock, y = benchmark log returns)
+    n      = Column(Integer)
+    sum_x  = Column(Float)
+    sum_y  = Column(Float)
+    sum_xx = Column(Float)
+    sum_yy = Column(Float)
+    sum_xy = Column(Float)
+    # Stock close on trade_date: a later run continues from these sums only if it is unchanged
+    close  = Column(Float)
+    stock  = relationship("Stock", back_populates="volatility_timeseries")
+
+class IndicatorValues(Base):
+    """Standard-parameter indicators per bar (see app/indicators.py), NULL during warm-up."""
+    __tablename__ = "indicator_values"
+    stock_id      = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    trade_date    = Column(Date, primary_key=True)
+    rsi           = Column(Float)
+    macd          = Column(Float)
+    macd_signal   = Column(Float)
+    macd_hist     = Column(Float)
+    stoch_slowk   = Column(Float)
+    stoch_slowd   = Column(Float)
+    sma           = Column(Float)
+    ema           = Column(Float)
+    adx           = Column(Float)
+    bbands_upper  = Column(Float)
+    bbands_middle = Column(Float)
+    bbands_lower  = Column(Float)
+    atr           = Column(Float)
+    obv           = Column(Float)
+
+class IndicatorState(Base):
+    """Streaming indicator state after last_date, continued by the next indicator run."""
+    __tablename__ = "indicator_state"
+    stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    last_date  = Column(Date, nullable=False)
+    last_close = Column(Float, nullable=False)  # Detects rewritten history (e.g. split adjustments)
+    state      = Column(JSON, nullable=False)
+
+class PatternSignal(Base):
+    """Non-zero candlestick pattern outputs (app/indicators.py CANDLESTICK_PATTERNS)."""
+    __tablename__ = "pattern_signals"
+    __table_args__ = (
+        # Cross-sectional scans: which stocks printed a pattern since a date
+        Index("ix_pattern_signals_pattern_trade_date", "pattern", "trade_date"),
+    )
+    stock_id   = Column(Integer, ForeignKey("stocks.id"), primary_key=True)
+    trade_date = Column(Date, primary_key=True)
+    pattern    = Column(String, primary_key=True)  # e.g. cdl_hammer
+    value      = Column(Integer, nullable=False)  # TA-Lib output: ±100 (±200 when confirmed)
+
+class DataVersion(Base):
+    __tablename__ = "data_version"
+    id         = Column(Integer, primary_key=True)  # Single row, id = 1
+    version    = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime)
+
+def bump_data_version(session):
+    """Signal the API that stored data changed so its response caches invalidate"""
+    bumped = session.execute(
+        update(DataVersion)
+        .where(DataVersion.id == 1)
+        .values(version=DataVersion.version + 1, updated_at=datetime.utcnow())
+    )
+    if bumped.rowcount == 0:
+        session.add(DataVersion(id=1, version=1, updated_at=datetime.utcnow()))
+    session.commit()
+
 def create_all_tables():
     Base.metadata.create_all(engine)
 
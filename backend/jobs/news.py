@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy.orm import sessionmaker
+from config import engine, NEWS_WORKERS, YF_RATE_LIMIT
+from sources import YFinanceSource, FixtureSource
+from models import Stock
+
+# Persistence and scoring are shared with the API's /stocks/{symbol}/news
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "api"))
+from app.core.news import refresh_stock_news
+from app.core.sentiment import SentimentWorker
+
+Session = sessionmaker(bind=engine)
+
+
+def fetch_stock_news(stock_id, symbol, source):
+    """Refresh one symbol's news in its own Session; returns the new article ids."""
+    session = Session()
+    try:
+        return refresh_stock_news(session, stock_id, symbol, ticker=source.ticker(symbol))
+    finally:
+        session.close()
+
+
+def score_news(article_ids):
+    """
+    Score new articles in SentimentWorker-sized batches, through the shared
+    inference server when SENTIMENT_SOCKET is set, else a local model.
+    """
+    worker = SentimentWorker(session_factory=Session)
+    scored = 0
+    for start in range(0, len(article_ids), worker.batch_size):
+        scored += worker.score(article_ids[start:start + worker.batch_size])
+    return scored
+
+
+def run_news_prefetch(source, max_workers=NEWS_WORKERS):
+    """
+    Fetch and store news for every stock in the database, `max_workers`
+    symbols at a time (Yahoo requests share the host rate limit), then score
+    the newly inserted articles. Returns {symbol: error} for failed symbols.
+    """
+    session = Session()
+    try:
+        stocks = session.query(Stock.id, Stock.symbol).order_by(Stock.symbol).all()
+    finally:
+        session.close()
+
+    inserted, errors = [], {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(fetch_stock_news, stock.id, stock.symbol, source): stock.symbol
+            for stock in stocks
+        }
+        for future in as_completed(futures):
+            sym = futures[future]
+            try:
+                inserted.extend(future.result())
+            except Exception as e:
+                errors[sym] = str(e)
+                print(f"[{sym}] Error fetching news:", e)
+
+    print(f"News: {len(inserted)} new articles for {len(stocks) - len(errors)}/{len(stocks)} symbols")
+    if inserted:
+        print(f"Scored {score_news(inserted)} articles")
+    return errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prefetch and score news for all stocks")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=NEWS_WORKERS,
+        help="number of symbols fetched concurrently",
+    )
+    parser.add_argument(
+        "--every",
+        type=float,
+        help="keep running, starting a new prefetch every EVERY seconds",
+    )
+    parser.add_argument(
+        "--fixtures",
+        help="read news from recorded fixtures in this directory instead of Yahoo Finance",
+    )
+    args = parser.parse_args()
+
+    source = FixtureSource(args.fixtures) if args.fixtures else YFinanceSource(YF_RATE_LIMIT)
+    while True:
+        started = time.monotonic()
+        run_news_prefetch(source, max_workers=args.workers)
+        if args.every is None:
+            break
+        time.sleep(max(0.0, args.every - (time.monotonic() - started)))
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import pickle
+import threading
+import pandas as pd
+import yfinance as yf
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second (bursts up to `burst`)."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+
+def get_host_limiter(host, rate):
+    """One shared RateLimiter per upstream host, whichever source asks for it."""
+    with _host_limiters_lock:
+        if host not in _host_limiters:
+            _host_limiters[host] = RateLimiter(rate)
+        return _host_limiters[host]
+
+
+class RateLimitedTicker:
+    """
+    Wraps a yf.Ticker so every data property access or method call first takes
+    a token from the host limiter.
+    """
+
+    def __init__(self, ticker, limiter):
+        self._ticker = ticker
+        self._limiter = limiter
+
+    def __getattr__(self, name):
+        if callable(getattr(type(self._ticker), name, None)):
+            method = getattr(self._ticker, name)
+
+            def call(*args, **kwargs):
+                self._limiter.acquire()
+                return method(*args, **kwargs)
+
+            return call
+        self._limiter.acquire()
+        return getattr(self._ticker, name)
+
+
+def split_download(wide, symbols):
+    """Split a yf.download(group_by="ticker") frame into {symbol: OHLC frame}."""
+    frames = {}
+    if wide is None or wide.empty:
+        return frames
+    if isinstance(wide.columns, pd.MultiIndex):
+        available = set(wide.columns.get_level_values(0))
+        candidates = {s: wide[s] for s in symbols if s in available}
+    elif len(symbols) == 1:
+        candidates = {symbols[0]: wide}
+    else:
+        return frames
+    for symbol, frame in candidates.items():
+        # Dates only some symbols traded on come back as NaN bars for the rest
+        frame = frame.dropna(subset=["Close"]) if "Close" in frame else frame.dropna(how="all")
+        if not frame.empty:
+            frames[symbol] = frame
+    return frames
+
+
+class YFinanceSource:
+    """Live data from Yahoo Finance, throttled per host."""
+
+    host = "query2.finance.yahoo.com"
+
+    def __init__(self, rate):
+        self.limiter = get_host_limiter(self.host, rate)
+
+    def ticker(self, symbol):
+        return RateLimitedTicker(yf.Ticker(symbol), self.limiter)
+
+    def download(self, symbols, start=None, period=None):
+        """
+        OHLC plus Dividends/Stock Splits for many symbols in one yf.download
+        call; returns {symbol: frame} for the symbols that came back.
+        """
+        # yf.download still hits the chart endpoint once per symbol internally
+        for _ in symbols:
+            self.limiter.acquire()
+        wide = yf.download(
+            symbols,
+            start=start,
+            period=None if start is not None else period,
+            auto_adjust=False,
+            actions=True,
+            group_by="ticker",
+            progress=False,
+        )
+        return split_download(wide, symbols)
+
+
+class FixtureFastInfo(dict):
+    def toJSON(self):
+        return json.dumps(self)
+
+
+class FixtureTicker:
+    """
+    Offline stand-in for yf.Ticker backed by a dict of attribute name → value.
+    "history" holds the full OHLC frame; history(start=...) slices it.
+    Missing attributes read as None.
+    """
+
+    def __init__(self, data):
+        self._data = data
+
+    def history(self, period=None, start=None, **kwargs):
+        hist = self._data.get("history")
+        if hist is None:
+            return pd.DataFrame()
+        if start is not None:
+            cutoff = pd.Timestamp(start)
+            if hist.index.tz is not None:
+                cutoff = cutoff.tz_localize(hist.index.tz)
+            hist = hist[hist.index >= cutoff]
+        return hist
+
+    @property
+    def fast_info(self):
+        return FixtureFastInfo(self._data.get("fast_info") or {})
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._data.get(name)
+
+
+class FixtureSource:
+    """
+    Reads recorded tickers from `directory`/<SYMBOL>.pkl, each a pickled dict
+    as produced by record_fixture(). Used to run the ingest without network.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def ticker(self, symbol):
+        path = os.path.join(self.directory, f"{symbol}.pkl")
+        with open(path, "rb") as f:
+            return FixtureTicker(pickle.load(f))
+
+    def download(self, symbols, start=None, period=None):
+        frames = {}
+        for symbol in symbols:
+            try:
+                hist = self.ticker(symbol).history(period=period, start=start)
+            except FileNotFoundError:
+                continue
+            if not hist.empty:
+                frames[symbol] = hist
+        return frames
+
+
+FIXTURE_ATTRIBUTES = [
+    "dividends",
+    "splits",
+    "info",
+    "financials",
+    "balance_sheet",
+    "cashflow",
+    "earnings",
+    "calendar",
+    "sec_filings",
+    "sustainability",
+    "news",
+]
+
+
+def record_fixture(directory, symbol, period="3y"):
+    """Snapshot a live ticker into `directory`/<SYMBOL>.pkl for FixtureSource."""
+    ticker = yf.Ticker(symbol)
+    data = {"history": ticker.history(period=period, auto_adjust=False)}
+    for name in FIXTURE_ATTRIBUTES:
+        try:
+            data[name] = getattr(ticker, name)
+        except Exception as e:
+            print(f"[{symbol}] could not record {name}:", e)
+    try:
+        data["fast_info"] = json.loads(ticker.fast_info.toJSON())
+    except Exception as e:
+        print(f"[{symbol}] could not record fast_info:", e)
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{symbol}.pkl"), "wb") as f:
+        pickle.dump(data, f)
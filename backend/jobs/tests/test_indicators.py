@@ -0,0 +1,113 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from models import IndicatorState, IndicatorValues, PatternSignal, Stock, StockOHLC
+
+START = date(2024, 1, 1)
+STOCK_ID = 1
+
+
+def make_bars(n, seed=11):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    volume = rng.integers(1_000, 100_000, n)
+    return [
+        (round(o, 4), round(h, 4), round(l, 4), round(c, 4), int(v))
+        for o, h, l, c, v in zip(open_, high, low, close, volume)
+    ]
+
+
+def add_bars(session, bars, lo, hi):
+    for k in range(lo, hi):
+        o, h, l, c, v = bars[k]
+        session.add(StockOHLC(
+            stock_id=STOCK_ID,
+            trade_date=START + timedelta(days=k),
+            open=o, high=h, low=l, close=c, volume=v,
+        ))
+    session.commit()
+
+
+def update(session, full=False):
+    written = indicators.update_stock_indicators(session, STOCK_ID, full=full)
+    session.commit()
+    return written
+
+
+def stored(session):
+    values = pd.read_sql(
+        session.query(IndicatorValues).order_by(IndicatorValues.trade_date).statement,
+        session.bind,
+    )
+    signals = pd.read_sql(
+        session.query(PatternSignal)
+        .order_by(PatternSignal.trade_date, PatternSignal.pattern)
+        .statement,
+        session.bind,
+    )
+    return values, signals
+
+
+def assert_matches_full_rebuild(session):
+    values, signals = stored(session)
+    assert not signals.empty
+    update(session, full=True)
+    full_values, full_signals = stored(session)
+    pd.testing.assert_frame_equal(values, full_values, rtol=1e-12)
+    pd.testing.assert_frame_equal(signals, full_signals)
+
+
+def test_incremental_run_only_feeds_new_bars_and_matches_full_rebuild(session):
+    """Both indicator_values and pattern_signals must equal a --full run."""
+    session.add(Stock(id=STOCK_ID, symbol="AAA"))
+    bars = make_bars(330)
+    add_bars(session, bars, 0, 300)
+    assert update(session) == 300
+
+    add_bars(session, bars, 300, 330)
+    state = session.get(IndicatorState, STOCK_ID)
+    _, skip = indicators.load_incremental_bars(session, STOCK_ID, state)
+    assert skip == indicators.WINDOW_TAIL
+    assert update(session) == 30
+    # The hits on the new bars come from the 30 new bars plus WINDOW_TAIL context
+    _, signals = stored(session)
+    new_hits = signals[pd.to_datetime(signals.trade_date).dt.date >= START + timedelta(days=300)]
+    assert not new_hits.empty
+    assert_matches_full_rebuild(session)
+
+
+def test_revised_last_close_falls_back_to_full_recompute(session):
+    session.add(Stock(id=STOCK_ID, symbol="AAA"))
+    bars = make_bars(330)
+    add_bars(session, bars, 0, 300)
+    update(session)
+
+    # The ingest re-fetches the last stored bar, e.g. after a split adjustment
+    last = session.get(StockOHLC, (STOCK_ID, START + timedelta(days=299)))
+    last.close = float(last.close) * 1.05
+    session.commit()
+    state = session.get(IndicatorState, STOCK_ID)
+    assert indicators.load_incremental_bars(session, STOCK_ID, state) is None
+
+    add_bars(session, bars, 300, 330)
+    assert update(session) == 330
+    assert_matches_full_rebuild(session)
+
+
+def test_missing_last_bar_falls_back_to_full_recompute(session):
+    session.add(Stock(id=STOCK_ID, symbol="AAA"))
+    add_bars(session, make_bars(300), 0, 300)
+    update(session)
+
+    session.query(StockOHLC).filter(StockOHLC.trade_date == START + timedelta(days=299)).delete()
+    session.commit()
+    state = session.get(IndicatorState, STOCK_ID)
+    assert indicators.load_incremental_bars(session, STOCK_ID, state) is None
+    assert update(session) == 299
+    assert_matches_full_rebuild(session)
@@ -0,0 +1,147 @@
+import pickle
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+from models import Stock, StockDividend, StockInfo, StockOHLC, StockSplit
+
+DAYS = 40
+
+
+def history(seed, days=DAYS):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-02", periods=days, freq="B", tz="America/New_York")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        "Open": close * 0.99,
+        "High": close * 1.01,
+        "Low": close * 0.98,
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(1_000, 100_000, days),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+
+
+def fixture(seed):
+    hist = history(seed)
+    return {
+        "history": hist,
+        "dividends": pd.Series([0.25], index=hist.index[[10]]),
+        "splits": pd.Series([], dtype=float, index=pd.DatetimeIndex([], tz=hist.index.tz)),
+        "info": {"shortName": f"Fixture {seed}"},
+        "fast_info": {"lastPrice": float(hist["Close"].iloc[-1])},
+    }
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    """AAA and BBB are recorded; CCC has no fixture file, so loading it fails."""
+    for seed, symbol in enumerate(("AAA", "BBB")):
+        with open(tmp_path / f"{symbol}.pkl", "wb") as f:
+            pickle.dump(fixture(seed), f)
+    return ingest.FixtureSource(str(tmp_path))
+
+
+def ohlc_counts(session):
+    rows = (
+        session.query(Stock.symbol, StockOHLC.trade_date)
+        .join(StockOHLC, StockOHLC.stock_id == Stock.id)
+        .all()
+    )
+    counts = {}
+    for symbol, _ in rows:
+        counts[symbol] = counts.get(symbol, 0) + 1
+    return counts
+
+
+def test_run_ingest_loads_fixtures_and_reports_failures(session, fixtures):
+    symbols = ["AAA", "BBB", "CCC"]
+    results = ingest.run_ingest(symbols, fixtures, incremental=True, max_workers=2)
+
+    assert results["AAA"] == {} and results["BBB"] == {}
+    assert "load" in results["CCC"]
+    assert ohlc_counts(session) == {"AAA": DAYS, "BBB": DAYS}
+    assert session.query(StockDividend).count() == 2
+    assert session.query(StockInfo).count() == 2
+
+    closes = dict(
+        session.query(StockOHLC.trade_date, StockOHLC.close)
+        .join(Stock, Stock.id == StockOHLC.stock_id)
+        .filter(Stock.symbol == "AAA")
+        .all()
+    )
+    expected = history(0)["Close"]
+    assert [float(closes[d]) for d in expected.index.date] == pytest.approx(expected.tolist())
+
+
+def test_second_run_adds_no_rows(session, fixtures):
+    ingest.run_ingest(["AAA", "BBB"], fixtures, incremental=True, max_workers=2)
+    first = ohlc_counts(session)
+
+    download = fixtures.download
+    starts = []
+
+    def record_download(symbols, start=None, period=None):
+        starts.append(start)
+        return download(symbols, start=start, period=period)
+
+    fixtures.download = record_download
+    results = ingest.run_ingest(["AAA", "BBB"], fixtures, incremental=True, max_workers=2)
+    assert results == {"AAA": {}, "BBB": {}}
+    # One batched request from the last stored bar, not a full backfill
+    assert starts == [history(0).index[-1].date()]
+    assert ohlc_counts(session) == first
+    assert session.query(StockDividend).count() == 2
+
+
+def test_incremental_start():
+    last = date(2024, 3, 1)
+    assert ingest._incremental_start(None, False) is None
+    assert ingest._incremental_start(None, True) is None
+    assert ingest._incremental_start(last, False) == last
+    assert ingest._incremental_start(last, True) is None
+
+
+def write_fixture(directory, symbol, data):
+    with open(directory / f"{symbol}.pkl", "wb") as f:
+        pickle.dump(data, f)
+
+
+def stored_closes(session, symbol):
+    return [
+        float(close)
+        for (close,) in session.query(StockOHLC.close)
+        .join(Stock, Stock.id == StockOHLC.stock_id)
+        .filter(Stock.symbol == symbol)
+        .order_by(StockOHLC.trade_date)
+    ]
+
+
+def test_split_dated_on_the_last_stored_bar_reloads_earlier_bars(session, tmp_path):
+    source = ingest.FixtureSource(str(tmp_path))
+    # First run stores the ex-date bar before Yahoo lists the split
+    data = fixture(0)
+    write_fixture(tmp_path, "AAA", data)
+    ingest.run_ingest(["AAA"], source, incremental=True, max_workers=1)
+
+    # Yahoo now lists the 2:1 split on that same date and back-adjusts the bars before it
+    hist = data["history"].copy()
+    ex_date = hist.index[-1]
+    hist.loc[hist.index < ex_date, ["Open", "High", "Low", "Close", "Adj Close"]] /= 2
+    data.update(history=hist, splits=pd.Series([2.0], index=[ex_date]))
+    write_fixture(tmp_path, "AAA", data)
+    assert ingest.get_incremental_starts(session, ["AAA"]) == {"AAA": ex_date.date()}
+
+    ingest.run_ingest(["AAA"], source, incremental=True, max_workers=1)
+    assert stored_closes(session, "AAA") == pytest.approx(hist["Close"].tolist())
+    assert session.query(StockSplit.prices_adjusted).scalar() is True
+
+    # Handled: later runs go back to fetching from the last stored bar
+    assert ingest.get_incremental_starts(session, ["AAA"]) == {"AAA": ex_date.date()}
+    stock_id = session.query(Stock.id).filter(Stock.symbol == "AAA").scalar()
+    assert ingest.get_incremental_start(session, stock_id) == ex_date.date()
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import volatility
+from models import Stock, StockOHLC, VolatilityTimeseries
+
+START = date(2024, 1, 1)
+BENCHMARK_ID = 1
+
+
+def make_closes(n, seed=3):
+    rng = np.random.default_rng(seed)
+    return {
+        stock_id: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        for stock_id in (BENCHMARK_ID, 2, 3)
+    }
+
+
+def seed_stocks(session):
+    for stock_id, symbol in ((BENCHMARK_ID, "^GSPC"), (2, "AAA"), (3, "BBB"), (4, "NOBARS")):
+        session.add(Stock(id=stock_id, symbol=symbol))
+    session.commit()
+
+
+def add_bars(session, closes, lo, hi):
+    for stock_id, series in closes.items():
+        for k in range(lo, hi):
+            session.add(StockOHLC(
+                stock_id=stock_id,
+                trade_date=START + timedelta(days=k),
+                open=1, high=1, low=1,
+                close=float(series[k]),
+                volume=1,
+            ))
+    session.commit()
+
+
+def update(session):
+    written = volatility.update_volatility_timeseries(session)
+    session.commit()
+    return written
+
+
+def stored(session):
+    return pd.read_sql(
+        session.query(VolatilityTimeseries)
+        .order_by(
+            VolatilityTimeseries.stock_id,
+            VolatilityTimeseries.window_days,
+            VolatilityTimeseries.trade_date,
+        )
+        .statement,
+        session.bind,
+    )
+
+
+def rebuilt(session):
+    session.query(VolatilityTimeseries).delete()
+    session.commit()
+    update(session)
+    return stored(session)
+
+
+def assert_same_series(incremental, full):
+    assert len(incremental) == len(full)
+    pd.testing.assert_frame_equal(
+        incremental.reset_index(drop=True), full.reset_index(drop=True), rtol=1e-9
+    )
+
+
+def test_incremental_run_only_writes_new_bars_and_matches_full_rebuild(session):
+    seed_stocks(session)
+    closes = make_closes(400)
+    add_bars(session, closes, 0, 350)
+    update(session)
+
+    add_bars(session, closes, 350, 400)
+    # Stock 4 has no bars and must not force a rebuild of the others
+    written = update(session)
+    assert written == 3 * len(volatility.VOLATILITY_WINDOWS) * 50
+
+    assert_same_series(stored(session), rebuilt(session))
+
+
+def test_revised_last_bar_rebuilds_the_stock(session):
+    seed_stocks(session)
+    closes = make_closes(400)
+    add_bars(session, closes, 0, 350)
+    update(session)
+
+    # The ingest re-fetches the last stored bar, which may come back revised
+    revised_date = START + timedelta(days=349)
+    session.query(StockOHLC).filter_by(stock_id=2, trade_date=revised_date).update(
+        {"close": float(closes[2][349]) * 1.05}
+    )
+    session.commit()
+    add_bars(session, closes, 350, 400)
+    update(session)
+
+    incremental = stored(session)
+    revised_rows = incremental[
+        (incremental.stock_id == 2) & (incremental.trade_date == revised_date)
+    ]
+    assert len(revised_rows) == len(volatility.VOLATILITY_WINDOWS)
+    assert np.allclose(revised_rows.close, closes[2][349] * 1.05)
+    assert_same_series(incremental, rebuilt(session))
+
+
+def test_revised_benchmark_bar_rebuilds_every_stock(session):
+    seed_stocks(session)
+    closes = make_closes(400)
+    add_bars(session, closes, 0, 350)
+    update(session)
+
+    session.query(StockOHLC).filter_by(
+        stock_id=BENCHMARK_ID, trade_date=START + timedelta(days=349)
+    ).update({"close": float(closes[BENCHMARK_ID][349]) * 0.97})
+    session.commit()
+    add_bars(session, closes, 350, 400)
+    update(session)
+
+    assert_same_series(stored(session), rebuilt(session))
@@ -1,94 +1,346 @@
 import numpy as np
 import pandas as pd
 from datetime import datetime, date
+from bisect import bisect_left
+from sqlalchemy import func, text
 from sqlalchemy.orm import sessionmaker
-from config import engine
-from models import Stock, StockOHLC, VolatilityMetrics
+from config import engine, VOLATILITY_WINDOW, VOLATILITY_WINDOWS
+from bulk import bulk_upsert
+from models import (
+    Stock,
+    StockOHLC,
+    VolatilityMetrics,
+    VolatilityTimeseries,
+    bump_data_version,
+)
 
 Session = sessionmaker(bind=engine)
 
+# Latest metrics per stock, read by the API's /stocks/volatility-metrics
+LATEST_VOLATILITY_VIEW = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS latest_volatility AS
+SELECT DISTINCT ON (vm.stock_id)
+    vm.stock_id,
+    s.symbol,
+    vm.calculation_date,
+    vm.daily_volatility::float8 AS daily_volatility,
+    vm.annualized_volatility::float8 AS annualized_volatility,
+    vm.relative_volatility::float8 AS relative_volatility,
+    vm.beta::float8 AS beta,
+    vm.r_squared::float8 AS r_squared
+FROM volatility_metrics vm
+JOIN stocks s ON s.id = vm.stock_id
+ORDER BY vm.stock_id, vm.calculation_date DESC
+"""
+
 def calculate_returns(prices):
     """Calculate log returns from price series"""
     return np.log(prices / prices.shift(1))
 
-def calculate_volatility_metrics(stock_id, session, benchmark_symbol="^GSPC"):
+MIN_OBSERVATIONS = 30  # Need at least 30 days of data
+
+def load_close_matrix(session, since=None):
+    """
+    Load every stock's closes (from `since` on, if given) with one query,
+    pivoted into a trade_date × stock_id matrix
+    """
+    query = session.query(StockOHLC.stock_id, StockOHLC.trade_date, StockOHLC.close)
+    if since is not None:
+        query = query.filter(StockOHLC.trade_date >= since)
+    closes = pd.read_sql(query.order_by(StockOHLC.trade_date).statement, session.bind)
+    closes["trade_date"] = pd.to_datetime(closes["trade_date"])
+    return (
+        closes.pivot(index="trade_date", columns="stock_id", values="close")
+        .sort_index()
+        .astype(float)
+    )
+
+def moment_terms(returns, benchmark_returns):
+    """Per-date terms (1, x, y, x², y², xy) summed by the running moments"""
+    x = returns.to_numpy()
+    y = np.broadcast_to(benchmark_returns.to_numpy()[:, None], x.shape)
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    xm = np.where(mask, x, 0.0)
+    ym = np.where(mask, y, 0.0)
+    return {
+        "n": mask.astype(float),
+        "sx": xm,
+        "sy": ym,
+        "sxx": xm * xm,
+        "syy": ym * ym,
+        "sxy": xm * ym,
+    }
+
+def rolling_moments(returns, benchmark_returns, window=None):
+    """
+    Running sums n, Σx, Σy, Σx², Σy², Σxy for every column of `returns`
+    (x) against the benchmark (y), at every date, over the trailing `window`
+    rows (expanding when window is None). Computed with one cumulative sum
+    per moment, so every date costs O(1) regardless of the window length.
+    A date only counts for a column when both x and y are present.
+    """
+    moments = {}
+    for name, values in moment_terms(returns, benchmark_returns).items():
+        total = np.cumsum(values, axis=0)
+        if window is not None and window < len(total):
+            total[window:] = total[window:] - total[:-window]
+        moments[name] = total
+    return moments
+
+def metrics_from_moments(m):
+    """Volatility, relative volatility, beta and R² from rolling_moments sums"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n = m["n"]
+        mean_x = m["sx"] / n
+        mean_y = m["sy"] / n
+        var_x = np.maximum(m["sxx"] / n - mean_x * mean_x, 0)
+        var_y = np.maximum(m["syy"] / n - mean_y * mean_y, 0)
+        cov = m["sxy"] / n - mean_x * mean_y
+
+        daily_vol = np.sqrt(var_x)
+        benchmark_vol = np.sqrt(var_y)
+        return {
+            "daily_volatility": daily_vol,
+            "annualized_volatility": daily_vol * np.sqrt(252),  # Annualize using trading days
+            "relative_volatility": np.where(benchmark_vol != 0, daily_vol / benchmark_vol, np.nan),
+            "beta": np.where(var_y != 0, cov / var_y, np.nan),
+            "r_squared": np.where(var_x * var_y != 0, cov * cov / (var_x * var_y), np.nan),
+        }
+
+def align_returns(closes, benchmark_id):
     """
-    Calculate volatility metrics for a given stock
+    Log returns aligned on trade_date: the rows are inner-joined to the dates
+    on which the benchmark has a return
+    """
+    returns = calculate_returns(closes)
+    return returns[returns[benchmark_id].notna()]
+
+def compute_volatility_metrics(returns, benchmark_returns, window=None):
+    """
+    Vectorised volatility metrics for every column of `returns` against the
+    benchmark series, over the trailing `window` dates (all history if None).
+    Returns a DataFrame indexed like returns.columns.
+    """
+    moments = rolling_moments(returns, benchmark_returns, window)
+    latest = {name: values[-1] for name, values in metrics_from_moments(moments).items()}
+    metrics = pd.DataFrame(latest, index=returns.columns)
+    min_obs = MIN_OBSERVATIONS if window is None else min(MIN_OBSERVATIONS, window)
+    return metrics[moments["n"][-1] >= min_obs]
+
+def calculate_volatility_metrics(session, benchmark_symbol="^GSPC", window=VOLATILITY_WINDOW):
+    """
+    Calculate volatility metrics for every stock in one pass
     Args:
-        stock_id: ID of the stock to analyze
         session: SQLAlchemy session
         benchmark_symbol: Symbol of benchmark index (default: S&P 500)
+        window: trailing trading days to measure over (None: full history)
+    Returns a DataFrame of VolatilityMetrics rows, or None without a benchmark
     """
-    # Get stock price data
-    stock_data = pd.read_sql(
-        session.query(StockOHLC)
-        .filter(StockOHLC.stock_id == stock_id)
-        .statement,
-        session.bind
-    )
-    
-    if stock_data.empty:
-        return None
-
-    # Get benchmark data
     benchmark_stock = session.query(Stock).filter(Stock.symbol == benchmark_symbol).first()
     if not benchmark_stock:
         return None
-        
-    benchmark_data = pd.read_sql(
-        session.query(StockOHLC)
-        .filter(StockOHLC.stock_id == benchmark_stock.id)
-        .statement,
-        session.bind
-    )
 
-    # Calculate daily returns
-    stock_returns = calculate_returns(stock_data.close)
-    benchmark_returns = calculate_returns(benchmark_data.close)
+    closes = load_close_matrix(session)
+    if benchmark_stock.id not in closes.columns:
+        return None
 
-    # Align the return series
-    combined_returns = pd.concat([stock_returns, benchmark_returns], axis=1).dropna()
-    if len(combined_returns) < 30:  # Need at least 30 days of data
+    returns = align_returns(closes, benchmark_stock.id)
+    if returns.empty:
         return None
+    metrics = compute_volatility_metrics(returns, returns[benchmark_stock.id], window)
 
-    # Calculate volatility metrics
-    daily_vol = np.std(combined_returns.iloc[:, 0])
-    annualized_vol = daily_vol * np.sqrt(252)  # Annualize using trading days
-    
-    # Calculate relative volatility (ratio to benchmark volatility)
-    benchmark_vol = np.std(combined_returns.iloc[:, 1])
-    relative_vol = daily_vol / benchmark_vol if benchmark_vol != 0 else None
-
-    # Calculate beta and R-squared
-    covariance = np.cov(combined_returns.iloc[:, 0], combined_returns.iloc[:, 1])[0, 1]
-    variance = np.var(combined_returns.iloc[:, 1])
-    beta = covariance / variance if variance != 0 else None
-    
-    # Calculate R-squared
-    correlation = np.corrcoef(combined_returns.iloc[:, 0], combined_returns.iloc[:, 1])[0, 1]
-    r_squared = correlation ** 2
-
-    return VolatilityMetrics(
-        stock_id=stock_id,
-        calculation_date=date.today(),
-        daily_volatility=float(daily_vol),
-        annualized_volatility=float(annualized_vol),
-        relative_volatility=float(relative_vol) if relative_vol else None,
-        beta=float(beta) if beta else None,
-        r_squared=float(r_squared)
+    metrics.index.name = "stock_id"
+    metrics = metrics.reset_index()
+    metrics.insert(1, "calculation_date", date.today())
+    return metrics
+
+def refresh_latest_volatility_view(session):
+    """Create (first run) or refresh the latest_volatility materialized view"""
+    if session.bind.dialect.name != "postgresql":
+        return
+    session.execute(text(LATEST_VOLATILITY_VIEW))
+    # CONCURRENTLY keeps the view readable during refresh; it needs a unique index
+    session.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_latest_volatility_stock_id "
+        "ON latest_volatility (stock_id)"
+    ))
+    session.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY latest_volatility"))
+    session.commit()
+
+# volatility_timeseries column holding each running sum
+TIMESERIES_SUMS = {
+    "n": "n",
+    "sx": "sum_x",
+    "sy": "sum_y",
+    "sxx": "sum_xx",
+    "syy": "sum_yy",
+    "sxy": "sum_xy",
+}
+
+def load_timeseries_state(session):
+    """
+    Latest stored running sums per (stock_id, window_days), with the close
+    they were computed from and the stock's current close on that date (None
+    when the bar is gone):
+    {(stock_id, window_days): (trade_date, {moment: value}, stored_close, current_close)}
+    """
+    vt = VolatilityTimeseries
+    latest = (
+        session.query(vt.stock_id, vt.window_days, func.max(vt.trade_date).label("trade_date"))
+        .group_by(vt.stock_id, vt.window_days)
+        .subquery()
+    )
+    rows = (
+        session.query(vt, StockOHLC.close)
+        .join(
+            latest,
+            (vt.stock_id == latest.c.stock_id)
+            & (vt.window_days == latest.c.window_days)
+            & (vt.trade_date == latest.c.trade_date),
+        )
+        .outerjoin(
+            StockOHLC,
+            (StockOHLC.stock_id == vt.stock_id) & (StockOHLC.trade_date == vt.trade_date),
+        )
+        .all()
     )
+    return {
+        (row.stock_id, row.window_days): (
+            row.trade_date,
+            {m: float(getattr(row, col) or 0) for m, col in TIMESERIES_SUMS.items()},
+            row.close,
+            None if current_close is None else float(current_close),
+        )
+        for row, current_close in rows
+    }
+
+def stocks_to_rebuild(state, stock_ids, benchmark_id, windows):
+    """
+    Stocks whose series can't continue from the stored sums: a window has no
+    state yet, or the bar the state ends on was revised or removed (e.g. the
+    ingest re-fetched the last bar). A revised benchmark bar changes every
+    stock's benchmark terms, so it rebuilds them all.
+    """
+    rebuild = set()
+    for stock_id in stock_ids:
+        for w in windows:
+            entry = state.get((stock_id, w))
+            if entry is None or entry[2] is None or entry[2] != entry[3]:
+                rebuild.add(stock_id)
+                break
+    if benchmark_id in rebuild:
+        return set(stock_ids)
+    return rebuild
+
+def update_volatility_timeseries(session, benchmark_symbol="^GSPC", windows=VOLATILITY_WINDOWS):
+    """
+    Extend volatility_timeseries with rolling volatility and beta for every
+    trading day not stored yet. Each (stock, window) continues from its last
+    stored running sums: a new bar adds its terms and drops the terms of the
+    bar leaving the window, so only the new bars (plus one window of history
+    to subtract) are read and computed. The decision is per stock: a stock
+    without state, or whose last stored bar has changed since, is deleted and
+    rebuilt from its full history.
+    Returns the number of rows written.
+    """
+    benchmark_stock = session.query(Stock).filter(Stock.symbol == benchmark_symbol).first()
+    if not benchmark_stock:
+        return 0
+
+    state = load_timeseries_state(session)
+    # Stocks without any bars (e.g. a symbol that failed to load) have nothing to compute
+    stock_ids = [stock_id for (stock_id,) in session.query(StockOHLC.stock_id).distinct()]
+    rebuild = stocks_to_rebuild(state, stock_ids, benchmark_stock.id, windows)
+    if rebuild:
+        session.query(VolatilityTimeseries).filter(
+            VolatilityTimeseries.stock_id.in_(rebuild)
+        ).delete(synchronize_session=False)
+
+    since = None
+    if stock_ids and not rebuild:
+        # Load from one window (plus the bar giving the first return) before the oldest state
+        bench_dates = [
+            d for (d,) in session.query(StockOHLC.trade_date)
+            .filter(StockOHLC.stock_id == benchmark_stock.id)
+            .order_by(StockOHLC.trade_date)
+        ]
+        oldest = min(state[(sid, w)][0] for sid in stock_ids for w in windows)
+        i = bisect_left(bench_dates, oldest)
+        since = bench_dates[max(0, i - max(windows))] if bench_dates else None
+
+    closes = load_close_matrix(session, since)
+    if benchmark_stock.id not in closes.columns:
+        return 0
+    returns = align_returns(closes, benchmark_stock.id)
+    if returns.empty:
+        return 0
+
+    dates = returns.index.to_numpy()
+    has_return = ~np.isnan(returns.to_numpy())
+    close_values = closes.loc[returns.index, returns.columns].to_numpy()
+    terms = moment_terms(returns, returns[benchmark_stock.id])
+    rows_idx = np.arange(len(dates))[:, None]
+
+    frames = []
+    for w in windows:
+        # First row to (re)compute per stock, and the stored sums it continues from
+        first = np.zeros(len(returns.columns), dtype=int)
+        base = {m: np.zeros(len(returns.columns)) for m in TIMESERIES_SUMS}
+        for j, stock_id in enumerate(returns.columns):
+            if stock_id not in rebuild and (stock_id, w) in state:
+                last_date, sums, _, _ = state[(stock_id, w)]
+                first[j] = np.searchsorted(dates, np.datetime64(last_date), side="right")
+                for m in TIMESERIES_SUMS:
+                    base[m][j] = sums[m]
+
+        sums = {}
+        for m, values in terms.items():
+            delta = values.copy()
+            if w < len(delta):
+                delta[w:] -= values[:-w]
+            total = np.cumsum(delta, axis=0)
+            offset = np.where(
+                first > 0, total[np.maximum(first - 1, 0), np.arange(len(first))], 0.0
+            )
+            sums[m] = total - offset + base[m]
+
+        metrics = metrics_from_moments(sums)
+        window_full = sums["n"] >= w
+        keep = has_return & (rows_idx >= first)
+        r, c = np.nonzero(keep)
+        frame = pd.DataFrame({
+            "stock_id": returns.columns.to_numpy()[c],
+            "window_days": w,
+            "trade_date": pd.DatetimeIndex(dates[r]).date,
+            "volatility": np.where(window_full, metrics["annualized_volatility"], np.nan)[r, c],
+            "beta": np.where(window_full, metrics["beta"], np.nan)[r, c],
+        })
+        for m, col in TIMESERIES_SUMS.items():
+            frame[col] = sums[m][r, c]
+        frame["close"] = close_values[r, c]
+        frame["n"] = frame["n"].round().astype(int)
+        frames.append(frame)
+
+    rows = pd.concat(frames, ignore_index=True)
+    bulk_upsert(session, VolatilityTimeseries.__table__, rows)
+    return len(rows)
 
 def run_volatility_analysis():
     """Run volatility analysis for all stocks"""
     session = Session()
     try:
-        stocks = session.query(Stock).all()
-        for stock in stocks:
-            print(f"Calculating volatility metrics for {stock.symbol}...")
-            metrics = calculate_volatility_metrics(stock.id, session)
-            if metrics:
-                session.merge(metrics)
+        print("Calculating volatility metrics for all stocks...")
+        metrics = calculate_volatility_metrics(session)
+        if metrics is not None:
+            bulk_upsert(session, VolatilityMetrics.__table__, metrics)
+            print(f"Stored volatility metrics for {len(metrics)} stocks")
+        session.commit()
+        print("Updating rolling volatility time series...")
+        written = update_volatility_timeseries(session)
         session.commit()
+        print(f"Stored {written} volatility time series rows")
+        refresh_latest_volatility_view(session)
+        bump_data_version(session)
     except Exception as e:
         print(f"Error during volatility analysis: {e}")
         session.rollback()
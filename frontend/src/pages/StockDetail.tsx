@@ -60,31 +60,23 @@ export const StockDetail: React.FC = () => {
             if (!symbol) return;
 
             try {
-                const [
-                    ohlcResponse,
-                    infoResponse,
-                    incomeResponse,
-                    balanceResponse,
-                    cashflowResponse,
-                    earningsResponse,
-                    volatilityResponse
-                ] = await Promise.all([
-                    stocksAPI.getOHLC(symbol),
-                    stocksAPI.getInfo(symbol),
-                    stocksAPI.getIncome(symbol),
-                    stocksAPI.getBalance(symbol),
-                    stocksAPI.getCashflow(symbol),
-                    stocksAPI.getEarnings(symbol),
-                    stocksAPI.getVolatility(symbol)
+                const { data } = await stocksAPI.getBundle(symbol, [
+                    'ohlc',
+                    'info',
+                    'income',
+                    'balance',
+                    'cashflow',
+                    'earnings',
+                    'volatility'
                 ]);
 
-                setOHLCData(ohlcResponse.data);
-                setInfo(infoResponse.data.data);
-                setIncome(incomeResponse.data);
-                setBalance(balanceResponse.data);
-                setCashflow(cashflowResponse.data);
-                setEarnings(earningsResponse.data);
-                setVolatility(volatilityResponse.data);
+                setOHLCData(data.ohlc ?? []);
+                setInfo(data.info?.data ?? null);
+                setIncome(data.income ?? []);
+                setBalance(data.balance ?? []);
+                setCashflow(data.cashflow ?? []);
+                setEarnings(data.earnings ?? []);
+                setVolatility(data.volatility);
             } catch (error) {
                 console.error('Failed to fetch stock data:', error);
             }
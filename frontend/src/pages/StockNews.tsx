@@ -24,8 +24,8 @@ interface NewsArticle {
     publisher: string;
     link: string;
     published_date: string;
-    sentiment_score: number;
-    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL';
+    sentiment_score: number | null;
+    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL' | null;
     cached_at: string;
 }
 
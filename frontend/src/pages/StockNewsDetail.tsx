@@ -20,8 +20,8 @@ interface NewsArticle {
     publisher: string;
     link: string;
     published_date: string;
-    sentiment_score: number;
-    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL';
+    sentiment_score: number | null;
+    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL' | null;
     cached_at: string;
 }
 
@@ -51,7 +51,7 @@ export const StockNewsDetail: React.FC = () => {
         fetchNews();
     }, [symbol]);
 
-    const getSentimentColor = (sentiment: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL') => {
+    const getSentimentColor = (sentiment: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL' | null) => {
         switch (sentiment) {
             case 'POSITIVE':
                 return theme.palette.success.main;
@@ -63,10 +63,11 @@ export const StockNewsDetail: React.FC = () => {
     };
 
     const calculateAverageSentiment = () => {
-        if (news.length === 0) return null;
+        const scored = news.filter(article => article.sentiment_score !== null);
+        if (scored.length === 0) return null;
 
-        const total = news.reduce((acc, article) => acc + article.sentiment_score, 0);
-        return total / news.length;
+        const total = scored.reduce((acc, article) => acc + (article.sentiment_score ?? 0), 0);
+        return total / scored.length;
     };
 
     const averageSentiment = calculateAverageSentiment();
@@ -106,7 +107,7 @@ export const StockNewsDetail: React.FC = () => {
                         {(averageSentiment * 100).toFixed(1)}% Positive
                     </Typography>
                     <Typography variant="body2" color="text.secondary">
-                        Based on {news.length} articles
+                        Based on {news.filter(article => article.sentiment_score !== null).length} articles
                     </Typography>
                 </Paper>
             )}
@@ -144,7 +145,9 @@ export const StockNewsDetail: React.FC = () => {
                                     </Typography>
                                 </Box>
                                 <Chip
-                                    label={`${(article.sentiment_score * 100).toFixed(1)}% ${article.sentiment_label}`}
+                                    label={article.sentiment_score === null
+                                        ? 'Scoring…'
+                                        : `${(article.sentiment_score * 100).toFixed(1)}% ${article.sentiment_label}`}
                                     sx={{
                                         ml: 2,
                                         color: 'white',
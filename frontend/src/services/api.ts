@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { AuthResponse, Stock, OHLCData, Dividend, Split, FinancialStatement, EarningsData, Filing, VolatilityMetrics, StockDailyChange } from '../types/api';
+import { AuthResponse, Stock, OHLCData, Dividend, Split, FinancialStatement, EarningsData, Filing, VolatilityMetrics, StockDailyChange, StockBundle, StockBundleField, SymbolPatternMatches, PatternColumns, IndicatorColumns, PatternSignal, OHLCColumns } from '../types/api';
 
 const BASE_URL = 'http://localhost:8000'; // Replace with your actual API URL
 axios.defaults.baseURL = BASE_URL;
@@ -25,8 +25,21 @@ export const stocksAPI = {
     getStock: (symbol: string) =>
         axios.get<Stock>(`/stocks/${symbol}`),
 
-    getOHLC: (symbol: string) =>
-        axios.get<OHLCData[]>(`/stocks/${symbol}/ohlc`),
+    getBundle: (symbol: string, fields?: StockBundleField[]) =>
+        axios.get<StockBundle>(`/stocks/${symbol}/bundle`, {
+            params: fields ? { fields: fields.join(',') } : undefined
+        }),
+
+    // Pass the last trade_date of a page as `after` to fetch the next one
+    getOHLC: (symbol: string, range?: { start?: string; end?: string; after?: string; limit?: number }) =>
+        axios.get<OHLCData[]>(`/stocks/${symbol}/ohlc`, { params: range }),
+
+    // Same bars as one array per column: about half the payload of getOHLC
+    getOHLCColumns: (symbol: string, range?: { start?: string; end?: string; after?: string; limit?: number }) =>
+        axios.get<OHLCColumns>(`/stocks/${symbol}/ohlc`, {
+            params: range,
+            headers: { Accept: 'application/x-columnar+json' }
+        }),
 
     getDividends: (symbol: string) =>
         axios.get<Dividend[]>(`/stocks/${symbol}/dividends`),
@@ -79,4 +92,35 @@ export const stocksAPI = {
                 lookback_period: lookbackPeriod
             }
         ),
+
+    analyzePatternColumns: (symbol: string, pattern: string, lookbackPeriod: number = 100) =>
+        axios.post<PatternColumns>(
+            `/patterns/analyze`,
+            {
+                symbol,
+                pattern_name: pattern,
+                lookback_period: lookbackPeriod,
+                format: 'columnar'
+            }
+        ),
+
+    analyzePatternsBatch: (symbols: string[], patterns: string[], lookbackPeriod: number = 100) =>
+        axios.post<SymbolPatternMatches[]>(
+            `/patterns/analyze/batch`,
+            {
+                symbols,
+                pattern_names: patterns,
+                lookback_period: lookbackPeriod
+            }
+        ),
+
+    getIndicators: (symbol: string, names?: string[], start?: string, end?: string) =>
+        axios.get<IndicatorColumns>(`/patterns/indicators/${symbol}`, {
+            params: { names: names?.join(','), start, end }
+        }),
+
+    scanPatterns: (patterns?: string[], days: number = 5, since?: string) =>
+        axios.get<PatternSignal[]>('/patterns/scan', {
+            params: { patterns: patterns?.join(','), days, since }
+        }),
 };
\ No newline at end of file
@@ -15,7 +15,7 @@ export interface OHLCData {
     high: number;
     low: number;
     close: number;
-    volume: number;
+    volume: number | null;
 }
 
 export interface Dividend {
@@ -58,6 +58,25 @@ export interface VolatilityMetrics {
     r_squared: number | null;
 }
 
+export interface StockBundle {
+    stock: Stock;
+    ohlc: OHLCData[] | null;
+    dividends: Dividend[] | null;
+    splits: Split[] | null;
+    info: { data: Record<string, any> } | null;
+    fast_info: { data: Record<string, any> } | null;
+    income: FinancialStatement[] | null;
+    balance: FinancialStatement[] | null;
+    cashflow: FinancialStatement[] | null;
+    earnings: EarningsData[] | null;
+    earnings_calendar: EarningsCalendar[] | null;
+    filings: Filing[] | null;
+    volatility: VolatilityMetrics | null;
+    sustainability: { data: Record<string, any> } | null;
+}
+
+export type StockBundleField = Exclude<keyof StockBundle, 'stock'>;
+
 export interface StockDailyChange {
     symbol: string;
     latest_date: string;
@@ -74,7 +93,48 @@ export interface NewsArticle {
     publisher: string;
     link: string;
     published_date: string;
-    sentiment_score: number;
-    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL';
+    // null until the API's background worker has scored the article
+    sentiment_score: number | null;
+    sentiment_label: 'POSITIVE' | 'NEGATIVE' | 'NEUTRAL' | null;
     cached_at: string;
-}
\ No newline at end of file
+}
+export interface PatternMatch {
+    pattern_name: string;
+    timestamp: string;
+    signal_value: number;
+}
+
+export interface SymbolPatternMatches {
+    symbol: string;
+    matches: Record<string, PatternMatch[]>;
+    errors: Record<string, string>;
+    error: string | null;
+}
+
+export interface PatternColumns {
+    pattern_name: string;
+    dates: string[];
+    values: Record<string, (number | null)[]>;
+}
+
+export interface OHLCColumns {
+    trade_date: string[];
+    open: (number | null)[];
+    high: (number | null)[];
+    low: (number | null)[];
+    close: (number | null)[];
+    volume: (number | null)[];
+}
+
+export interface PatternSignal {
+    symbol: string;
+    pattern_name: string;
+    trade_date: string;
+    value: number;
+}
+
+export interface IndicatorColumns {
+    symbol: string;
+    dates: string[];
+    values: Record<string, (number | null)[]>;
+}